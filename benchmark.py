@@ -0,0 +1,433 @@
+"""Benchmarks de desempenho do jogo.
+
+Uso:
+    python benchmark.py collision [--counts 50 500 5000]
+    python benchmark.py suite [--frames 600] [--out benchmark_results.json] [--baseline ARQUIVO]
+    python benchmark.py sessions [--counts 1 2 4]
+    python benchmark.py compare BASELINE RESULTADOS [--threshold 0.15]
+
+A suíte roda o jogo de verdade com SDL_VIDEODRIVER=dummy (sem janela). O
+`compare` (e o `suite --baseline`) sai com código 1 se alguma métrica
+piorar além do limite em relação ao baseline.
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FRAME_MS, OBJECT_SIZES, PHASE_2_SCORE, PHASE_3_SCORE,
+    SimObject, SimState, add_object, find_hits, move_objects, quantize, remove_object, spawn_object, step,
+)
+
+try:
+    import resource
+except ImportError: # Windows: sem pico de RSS
+    resource = None
+
+
+# --- Colisão: sweep and prune x varredura linear ---
+def _crowded_state(count, use_sweep, seed=0, narrowphase=None):
+    """Partida com `count` objetos espalhados por alguns túneis de altura."""
+    state = SimState(seed, use_sweep=use_sweep, narrowphase=narrowphase)
+    rng = random.Random(seed)
+    for _ in range(count):
+        obj_type = rng.choice(sorted(OBJECT_SIZES))
+        (min_w, max_w), (min_h, max_h) = OBJECT_SIZES[obj_type]
+        width, height = quantize(rng.randint(min_w, max_w)), quantize(rng.randint(min_h, max_h))
+        x = rng.randint(0, SCREEN_WIDTH - width)
+        y = rng.uniform(0, SCREEN_HEIGHT * 4)
+        add_object(state, obj_type, x, y, width, height, rng.uniform(1, 3))
+    return state
+
+
+def bench_collision(count, use_sweep, frames=300, repeat=3, narrowphase=None):
+    """Melhor tempo médio (ms) por frame de movimento + detecção de colisão."""
+    best = float('inf')
+    for _ in range(repeat):
+        state = _crowded_state(count, use_sweep, narrowphase=narrowphase)
+        events = []
+        start = time.perf_counter()
+        for _ in range(frames):
+            move_objects(state, 1, events)
+            find_hits(state)
+        best = min(best, (time.perf_counter() - start) / frames * 1000)
+    return best
+
+
+def run_collision(counts, frames):
+    """Varredura linear x sweep and prune; a última coluna é o sweep com o narrowphase de máscaras."""
+    from main import AssetManager
+    pixel = AssetManager(convert=False).pixel_narrowphase()
+    print(f"{'objetos':>8} | {'varredura (ms)':>14} | {'sweep (ms)':>10} | {'ganho':>6} | {'+ máscaras (ms)':>15}")
+    for count in counts:
+        scan = bench_collision(count, use_sweep=False, frames=frames)
+        sweep = bench_collision(count, use_sweep=True, frames=frames)
+        masks = bench_collision(count, use_sweep=True, frames=frames, narrowphase=pixel)
+        print(f"{count:>8} | {scan:>14.3f} | {sweep:>10.3f} | {scan / sweep:>5.1f}x | {masks:>15.3f}")
+
+
+# --- Suíte: cenários do jogo (SDL_VIDEODRIVER=dummy) ---
+SUITE_FRAMES = 600        # Frames medidos por cenário
+SUITE_WARMUP = 60         # Frames descartados antes de medir (caches, pools)
+ALLOC_FRAMES = 200        # Frames da passada com tracemalloc (medida à parte: ela é lenta)
+BURST_EVERY = 60          # Frames entre explosões no cenário de game over
+STRESS_OBJECTS = 200      # Objetos mantidos na tela no cenário de estresse
+SPAWNS_PER_FRAME = 50     # Objetos criados e descartados por frame no micro de spawn
+MICRO_PARTICLES = 3000    # Partículas vivas no micro de partículas
+ENTITIES = 10000          # Objetos vivos no micro do ObjectStore
+
+# métrica: (maior é melhor, piora relativa tolerada, folga absoluta abaixo da qual não conta)
+METRICS = {
+    'fps': (True, 0.15, 0.0),
+    'ms_per_frame': (False, 0.15, 0.05),
+    'p95_ms': (False, 0.30, 0.10),
+    'alloc_kib_per_frame': (False, 0.25, 1.0),
+    'allocs_per_frame': (False, 0.25, 5.0),
+    'retained_blocks_per_frame': (False, 0.25, 5.0),
+    'peak_rss_mib': (False, 0.10, 5.0),
+}
+
+
+def _peak_rss_mib():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024 # macOS: bytes; Linux: KiB
+
+
+def _measure(frame, frames):
+    """Roda `frame()` e mede tempo por frame, alocação por frame (tracemalloc) e pico de RSS."""
+    for _ in range(SUITE_WARMUP):
+        frame()
+
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        frame()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    total = sum(times)
+
+    # Alocação: pico de memória Python dentro de cada frame, blocos novos por frame e blocos que ficam vivos.
+    # Blocos novos: soma dos aumentos por linha de código entre o início e o fim de cada frame, então
+    # um bloco trocado por outro (a lista do frame anterior liberada, a nova criada) conta. O tracemalloc
+    # não vê o que nasce e morre dentro do mesmo frame; isso aparece no pico em KiB.
+    alloc_frames = min(frames, ALLOC_FRAMES)
+    gc.collect()
+    tracemalloc.start()
+    first = before = tracemalloc.take_snapshot()
+    allocated = 0
+    allocs = 0
+    for _ in range(alloc_frames):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        frame()
+        allocated += tracemalloc.get_traced_memory()[1] - base
+        after = tracemalloc.take_snapshot()
+        allocs += sum(stat.count_diff for stat in after.compare_to(before, 'traceback') if stat.count_diff > 0)
+        before = after
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in before.compare_to(first, 'filename'))
+
+    return {
+        'fps': frames / total,
+        'ms_per_frame': total / frames * 1000,
+        'p95_ms': times[int(len(times) * 0.95)] * 1000,
+        'alloc_kib_per_frame': allocated / alloc_frames / 1024,
+        'allocs_per_frame': allocs / alloc_frames,
+        'retained_blocks_per_frame': retained / alloc_frames,
+        'peak_rss_mib': _peak_rss_mib(),
+    }
+
+
+def _start_game(game, score=0):
+    """Partida imortal (sem colisões) já com o score e a população de objetos da fase, em cada sessão."""
+    game.new_game()
+    for session in game.sessions:
+        session.sim.narrowphase = lambda player, obj: False
+        while session.sim.score < score:
+            session.apply_sim_events(step(session.sim, 0))
+        session.score = session.sim.score
+
+
+def _game_frame(game):
+    return lambda: game.run_game_loop(FRAME_MS)
+
+
+def _burst_frame(game):
+    from main import RED, PARTICLES_GAME_OVER
+    count = [0]
+
+    def frame():
+        if count[0] % BURST_EVERY == 0: # Mesmo efeito da morte: explosão + shake
+            session = game.sessions[0]
+            player = session.sim.player
+            center = (player.x + player.width / 2, player.y + player.height / 2)
+            session.particles.emit(center, RED, size=8, num_particles=PARTICLES_GAME_OVER)
+            session.shake_screen(300)
+        count[0] += 1
+        game.run_game_loop(FRAME_MS)
+    return frame
+
+
+def _stress_frame(game):
+    session = game.sessions[0]
+
+    def frame():
+        sim = session.sim
+        while len(sim.objects) < STRESS_OBJECTS:
+            session.apply_sim_events([('spawn', spawn_object(sim))])
+        game.run_game_loop(FRAME_MS)
+    return frame
+
+
+def _particles_frame(game):
+    from main import ParticleSystem, YELLOW
+    particles = ParticleSystem()
+
+    def frame():
+        if len(particles) < MICRO_PARTICLES:
+            particles.emit((SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2), YELLOW, num_particles=MICRO_PARTICLES - len(particles))
+        particles.update()
+    return frame
+
+
+def _spawn_frame(game):
+    session = game.sessions[0]
+    sim = session.sim
+
+    def frame():
+        for _ in range(SPAWNS_PER_FRAME):
+            obj = spawn_object(sim)
+            session.objects.add(obj, sim.frames)
+            session.objects.remove(obj)
+            remove_object(sim, obj)
+        # O tempo não anda aqui, então o sweep nunca consumiria as entradas pendentes
+        # (no jogo elas saem quando o objeto passa pela faixa da Alice): só o push conta
+        sim.sweep.clear()
+    return frame
+
+
+def _entities_frame(game):
+    """ObjectStore com ENTITIES objetos subindo: mover, descartar, repor e desenhar."""
+    from main import ObjectStore
+    store = ObjectStore(game.assets)
+    canvas = game.sessions[0].canvas
+    rng = random.Random(0)
+    obj = SimObject(0, 'danger', 0, 0, 0, 0, 0)
+    now = [0.0]
+
+    def refill(top):
+        while len(store) < ENTITIES: # Repõe os que saíram pelo topo
+            obj_type = rng.choice(sorted(OBJECT_SIZES))
+            (min_w, max_w), (min_h, max_h) = OBJECT_SIZES[obj_type]
+            obj.id += 1
+            obj.obj_type = obj_type
+            obj.width = quantize(rng.randint(min_w, max_w)) if min_w != max_w else min_w
+            obj.height = quantize(rng.randint(min_h, max_h)) if min_h != max_h else min_h
+            obj.x = rng.randint(0, SCREEN_WIDTH - obj.width)
+            obj.y = rng.uniform(top, SCREEN_HEIGHT * 2)
+            obj.speed = rng.uniform(1, 3)
+            store.add(obj, now[0])
+    refill(0)
+
+    def frame():
+        now[0] += 1
+        store.update(now[0])
+        refill(SCREEN_HEIGHT)
+        store.draw(canvas)
+    return frame
+
+
+def _text_frame(game):
+    from main import WHITE, LIGHT_GRAY, YELLOW
+    canvas = game.sessions[0].canvas
+    count = [0]
+
+    def frame():
+        count[0] += 1
+        game.text.draw_number(canvas, game.font_small, "Score: ", count[0], WHITE, SCREEN_WIDTH / 2, 10)
+        game.draw_text(f"High Score: {game.high_score}", game.font_tiny, LIGHT_GRAY, SCREEN_WIDTH / 2, 40, canvas)
+        game.draw_text(f"Fase: {count[0] // 1000 % 3 + 1}", game.font_small, YELLOW, SCREEN_WIDTH / 2, 90, canvas)
+    return frame
+
+
+# nome: (score inicial, fábrica do frame)
+SCENARIOS = {
+    'phase1': (0, _game_frame),
+    'phase2': (PHASE_2_SCORE, _game_frame),
+    'phase3': (PHASE_3_SCORE, _game_frame),
+    'game_over_burst': (0, _burst_frame),
+    'stress': (PHASE_3_SCORE, _stress_frame),
+    'particles_update': (0, _particles_frame),
+    'object_spawn': (0, _spawn_frame),
+    'draw_text': (0, _text_frame),
+    'entities': (0, _entities_frame),
+}
+
+
+def _throwaway_scores(directory):
+    """Placar num diretório temporário: o benchmark não lê nem escreve o placar de verdade."""
+    from scores import ScoreStore
+    return ScoreStore(os.path.join(directory, "leaderboard.json"), os.path.join(directory, "scores.log"),
+                      os.path.join(directory, "highscore.txt"))
+
+
+def _run_scenario(name, frames):
+    """Um cenário num Game novo (sem gravar replays nem placar). Roda num processo próprio."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    from main import Game
+
+    with tempfile.TemporaryDirectory() as scratch:
+        game = Game(record=False, scores=_throwaway_scores(scratch))
+        score, make_frame = SCENARIOS[name]
+        _start_game(game, score)
+        result = _measure(make_frame(game), frames)
+        game.scores.close()
+    pygame.quit()
+    return result
+
+
+def run_suite(frames=SUITE_FRAMES, names=None):
+    """Roda cada cenário num processo novo: o pico de RSS (do processo inteiro) é só daquele cenário."""
+    import pygame
+
+    results = {}
+    context = multiprocessing.get_context('spawn') # Processo limpo, sem a memória do pai
+    for name in names or SCENARIOS:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[name] = pool.submit(_run_scenario, name, frames).result()
+        print(f"{name:>18} | {results[name]['fps']:>9.1f} FPS | {results[name]['p95_ms']:>7.2f} ms p95 | "
+              f"{results[name]['alloc_kib_per_frame']:>7.1f} KiB/frame | "
+              f"{results[name]['allocs_per_frame']:>7.1f} blocos/frame | "
+              f"{results[name]['peak_rss_mib'] or 0:>6.1f} MiB")
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'frames': frames,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+# --- Split-screen: custo do frame x número de sessões ---
+def bench_sessions(players, frames=SUITE_FRAMES, score=PHASE_2_SCORE):
+    """Tempo médio (ms) de um frame de jogo com `players` sessões lado a lado."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from main import Game
+
+    with tempfile.TemporaryDirectory() as scratch:
+        game = Game(record=False, players=players, scores=_throwaway_scores(scratch))
+        _start_game(game, score)
+        frame = _game_frame(game)
+        for _ in range(SUITE_WARMUP):
+            frame()
+        start = time.perf_counter()
+        for _ in range(frames):
+            frame()
+        elapsed = (time.perf_counter() - start) / frames * 1000
+        game.scores.close()
+    return elapsed
+
+
+def run_sessions(counts, frames):
+    print(f"{'sessões':>8} | {'ms/frame':>9} | {'ms/sessão':>9} | {'x 1 sessão':>10}")
+    single = None
+    for count in counts:
+        ms = bench_sessions(count, frames)
+        single = single or ms / count
+        print(f"{count:>8} | {ms:>9.3f} | {ms / count:>9.3f} | {ms / single:>9.2f}x")
+
+
+def compare(baseline, current, threshold=None):
+    """Lista de regressões (cenário, métrica, baseline, atual, variação) além dos limites de METRICS."""
+    regressions = []
+    for name, metrics in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric, (higher_is_better, limit, slack) in METRICS.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if old is None or new is None or old == 0:
+                continue
+            worse = old - new if higher_is_better else new - old
+            if threshold is not None:
+                limit = threshold
+            if worse > slack and worse / abs(old) > limit:
+                regressions.append((name, metric, old, new, worse / abs(old)))
+    return regressions
+
+
+def report_regressions(regressions):
+    if not regressions:
+        print("Sem regressões.")
+        return 0
+    for name, metric, old, new, change in regressions:
+        print(f"REGRESSÃO {name}.{metric}: {old:.3f} -> {new:.3f} ({change:+.0%} pior)")
+    return 1
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do jogo.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    collision = commands.add_parser('collision', help="sweep and prune x varredura linear")
+    collision.add_argument('--counts', type=int, nargs='+', default=[50, 500, 5000])
+    collision.add_argument('--frames', type=int, default=300)
+
+    suite = commands.add_parser('suite', help="cenários do jogo: FPS, alocação e pico de RSS")
+    suite.add_argument('--frames', type=int, default=SUITE_FRAMES)
+    suite.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help="roda só estes cenários")
+    suite.add_argument('--out', default='benchmark_results.json')
+    suite.add_argument('--baseline', help="compara com este resultado e falha se houver regressão")
+    suite.add_argument('--threshold', type=float, help="piora relativa tolerada em todas as métricas")
+
+    sessions = commands.add_parser('sessions', help="custo do frame com várias sessões (split-screen)")
+    sessions.add_argument('--counts', type=int, nargs='+', default=[1, 2, 4])
+    sessions.add_argument('--frames', type=int, default=SUITE_FRAMES)
+
+    comparison = commands.add_parser('compare', help="compara dois resultados da suíte")
+    comparison.add_argument('baseline')
+    comparison.add_argument('current')
+    comparison.add_argument('--threshold', type=float, help="piora relativa tolerada em todas as métricas")
+
+    args = parser.parse_args(argv)
+    if args.command == 'collision':
+        run_collision(args.counts, args.frames)
+    elif args.command == 'suite':
+        results = run_suite(args.frames, args.only)
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=1)
+        print(f"Resultados salvos em {args.out}")
+        if args.baseline:
+            return report_regressions(compare(_load(args.baseline), results, args.threshold))
+    elif args.command == 'sessions':
+        run_sessions(args.counts, args.frames)
+    elif args.command == 'compare':
+        return report_regressions(compare(_load(args.baseline), _load(args.current), args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
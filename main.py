@@ -1,16 +1,73 @@
+import time
+STARTUP_T0 = time.perf_counter() # Início do processo, para o --measure-startup
+
 import pygame
 import random
 import os
 import math
+import json
+import mmap
+import struct
+import argparse
+import cProfile
+import numpy as np
+from collections import OrderedDict, deque
+
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FPS, FRAME_MS, PLAYER_SIZES, EFFECT_DURATION, INITIAL_GAME_SPEED,
+    INPUT_LEFT, INPUT_RIGHT, PHASE_2_SCORE, PHASE_3_SCORE, OBJECT_SIZES, SimState, get_phase, quantize, step,
+)
+from quality import QUALITY_NAMES, QualityController
+from replay import FLAG_PIXEL_COLLISIONS, Replay, ReplayRecorder, narrowphase_for
+from scores import ScoreStore
+from telemetry import SCORE_SAMPLE_MS, TELEMETRY_DIR, Telemetry
 
 # --- Constantes do Jogo ---
 GAME_TITLE = "Alice no Túnel das Maravilhas"
-SCREEN_WIDTH = 600
-SCREEN_HEIGHT = 800
-FPS = 60
 
-# Arquivo para salvar a pontuação máxima
-HIGH_SCORE_FILE = "highscore.txt"
+# A simulação roda em passos fixos de FRAME_MS; o render pode ir a qualquer FPS
+MAX_FRAME_MS = 250 # Atraso máximo recuperado num frame (evita a espiral de passos atrasados)
+
+# Telas paradas (início e Game Over) dormem em pygame.event.wait entre os frames de animação
+IDLE_FPS = 10          # Frames das estrelas na tela de início (a tela em que um quiosque fica parado)
+IDLE_STAR_LAYERS = 1   # Só as camadas do fundo: as mais lentas, que a IDLE_FPS ainda andam sem saltos
+BLINK_MS = 500         # Meio período do texto piscando
+
+# Linhas do placar mostradas na tela de Game Over
+LEADERBOARD_SHOWN = 5
+
+# Teclas (esquerda, direita) de cada jogador no split-screen
+PLAYER_CONTROLS = (
+    (pygame.K_LEFT, pygame.K_RIGHT),
+    (pygame.K_a, pygame.K_d),
+    (pygame.K_j, pygame.K_l),
+    (pygame.K_KP4, pygame.K_KP6),
+)
+
+# Pasta dos sprites (PNG) e limites do cache de variantes escaladas
+BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # Assets e caches ficam junto do jogo, não no diretório atual
+ASSET_DIR = os.path.join(BASE_DIR, "assets")
+ASSET_CACHE_SIZE = 96    # Máximo de variantes escaladas mantidas em memória (LRU)
+TEXT_CACHE_SIZE = 128    # Máximo de textos renderizados mantidos em memória (LRU)
+
+# Inicialização rápida: variantes já escaladas em pixels crus e caminho da fonte
+# (gerados na primeira execução; apague a pasta para refazer)
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+ASSET_BUNDLE = os.path.join(CACHE_DIR, "assets.bundle")
+FONT_CACHE = os.path.join(CACHE_DIR, "font_path.txt")
+FONT_NAME = 'arial'
+
+# Confirma colisões de retângulo com máscaras (pixel a pixel) dos sprites
+PIXEL_PERFECT_COLLISIONS = True
+
+# Cada partida é gravada (seed + entrada) para replay e verificação do score
+REPLAY_DIR = "replays"
+
+# Profiler de frame (opcional, ativado com --profile)
+PROFILER_WINDOW = 300          # Frames usados nos percentis móveis
+PROFILER_TRACE_FRAMES = 36000  # Frames guardados para o arquivo de trace (10 min a 60 FPS)
+PROFILER_REFRESH = 30          # Frames entre atualizações do overlay
+PROFILE_CAPTURE_FRAMES = 300   # Duração da captura do cProfile (F10)
 
 # Cores
 FASE_1_COLOR = (20, 0, 40)
@@ -34,491 +91,1399 @@ GREEN = (76, 175, 80)     # Item "Beba-me" (Encolher)
 PURPLE = (156, 39, 176)   # Item "Coma-me" (Crescer)
 YELLOW = (255, 255, 0)    # Para partículas/destaques
 
-# Posição Y da Alice (primeiro quarto/terço da tela)
-PLAYER_START_Y = SCREEN_HEIGHT * 0.25
-
-# --- Classe para Efeitos de Partículas ---
-class Particle(pygame.sprite.Sprite):
-    """Cria uma explosão de partículas em um ponto. 100% procedural."""
-    def __init__(self, center, color, min_speed=1, max_speed=5, size=5, num_particles=10):
-        super().__init__()
-        self.particles = []
-        for _ in range(num_particles):
-            self.particles.append({
-                'pos': list(center),
-                'speed': [random.uniform(-max_speed, max_speed), random.uniform(-max_speed, max_speed)],
-                'color': color,
-                'radius': random.randint(min_speed, size)
-            })
-
-    def update(self):
-        for p in self.particles:
-            p['pos'][0] += p['speed'][0]
-            p['pos'][1] += p['speed'][1]
-            p['radius'] -= 0.1 # Partículas encolhem e desaparecem
-            if p['radius'] <= 0:
-                self.particles.remove(p)
-        if not self.particles:
-            self.kill() # Remove o sprite de partículas quando todas sumirem
+# Fundo: estrelas pré-desenhadas em camadas de parallax (uma por faixa de velocidade)
+STAR_COUNT = 2000
+STAR_LAYER_SPEEDS = (1.5, 2.75, 4.0, 5.25) # px/frame, do fundo para a frente
+STAR_COLORKEY = (255, 0, 255) # Cor transparente das camadas
+PHASE_3_FADE = 3000 # Pontos até a cor da fase 3 chegar ao tom final
+
+# Quantidade de partículas por explosão
+PARTICLES_GAME_OVER = 300
+PARTICLES_POWER_UP = 150
+
+# Sprite de cada tipo de objeto do túnel
+OBJECT_ASSETS = {
+    'danger': "obstaculo",
+    'shrink': "beba_me",  # diminui Alice
+    'grow': "coma_me",    # aumenta Alice
+}
+
+# --- Pacote de assets pré-convertidos ---
+BUNDLE_HEADER = struct.Struct('<4sII') # magic, versão, tamanho do índice (JSON)
+BUNDLE_MAGIC = b'ALAB'
+BUNDLE_VERSION = 1
+
+
+def bundle_variants():
+    """Todas as variantes (asset, largura, altura) que o jogo pode pedir."""
+    variants = {("alice", width, height) for width, height in PLAYER_SIZES.values()}
+    for obj_type, ((min_w, max_w), (min_h, max_h)) in OBJECT_SIZES.items():
+        # Mesmo sorteio de tamanhos do spawn_object
+        widths = {quantize(w) if min_w != max_w else min_w for w in range(min_w, max_w + 1)}
+        heights = {quantize(h) if min_h != max_h else min_h for h in range(min_h, max_h + 1)}
+        name = OBJECT_ASSETS[obj_type]
+        variants.update((name, w, h) for w in widths for h in heights)
+    return sorted(variants)
+
+
+def _bundle_sources(asset_dir):
+    """Tamanho e mtime de cada PNG: se algum mudar, o pacote é refeito."""
+    sources = {}
+    for filename in sorted(os.listdir(asset_dir)):
+        if filename.lower().endswith('.png'):
+            st = os.stat(os.path.join(asset_dir, filename))
+            sources[filename] = [st.st_size, st.st_mtime_ns]
+    return sources
+
+
+def build_asset_bundle(asset_dir=ASSET_DIR, path=ASSET_BUNDLE):
+    """Decodifica os PNGs, escala todas as variantes e grava os pixels RGBA crus."""
+    originals = {}
+    blobs = []
+    images = []
+    offset = 0
+    for name, width, height in bundle_variants():
+        if name not in originals:
+            originals[name] = pygame.image.load(os.path.join(asset_dir, name + ".png"))
+        data = pygame.image.tobytes(pygame.transform.smoothscale(originals[name], (width, height)), 'RGBA')
+        images.append([name, width, height, offset])
+        blobs.append(data)
+        offset += len(data)
+
+    index = json.dumps({'sources': _bundle_sources(asset_dir), 'images': images}).encode()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index)))
+        f.write(index)
+        for data in blobs:
+            f.write(data)
+    os.replace(tmp, path)
+
+
+def load_asset_bundle(asset_dir=ASSET_DIR, path=ASSET_BUNDLE, convert=True):
+    """Variantes do pacote (mapeado em memória, sem decodificar PNG), ou None se ele
+    não existe ou não corresponde mais aos PNGs ou às variantes de bundle_variants()."""
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): # ValueError: arquivo vazio
+        return None
+
+    try:
+        magic, version, index_size = BUNDLE_HEADER.unpack_from(mm)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            return None
+        index = json.loads(mm[BUNDLE_HEADER.size:BUNDLE_HEADER.size + index_size])
+        if index['sources'] != _bundle_sources(asset_dir):
+            return None
+        # Tamanhos do jogo mudaram (OBJECT_SIZES, SIZE_QUANTUM, PLAYER_HEIGHTS): refaz o pacote
+        if sorted((name, width, height) for name, width, height, _ in index['images']) != bundle_variants():
+            return None
+
+        base = BUNDLE_HEADER.size + index_size
+        surfaces = {}
+        with memoryview(mm) as view:
+            for name, width, height, offset in index['images']:
+                start = base + offset
+                pixels = view[start:start + width * height * 4]
+                raw = pygame.image.frombuffer(pixels, (width, height), 'RGBA')
+                # Converte para o formato da tela (a cópia solta o buffer mapeado)
+                surfaces[(name, width, height)] = raw.convert_alpha() if convert else raw.copy()
+                del raw
+                pixels.release()
+        return surfaces
+    except (struct.error, ValueError, KeyError, TypeError):
+        return None
+    finally:
+        mm.close()
+
+
+def resolve_font_path(name=FONT_NAME, cache_path=FONT_CACHE):
+    """Caminho da fonte do sistema. match_font varre as fontes instaladas, então o
+    resultado fica salvo em disco ("" = fonte padrão do pygame)."""
+    try:
+        with open(cache_path) as f:
+            path = f.read().strip()
+        if not path or os.path.exists(path):
+            return path or None
+    except OSError:
+        pass
+
+    path = pygame.font.match_font(name)
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(cache_path, 'w') as f:
+            f.write(path or "")
+    except OSError:
+        pass
+    return path
+
+
+# --- Gerenciador de Assets (cache de sprites) ---
+class AssetManager:
+    """Assets do jogo: as variantes que o jogo usa vêm do pacote pré-convertido
+    (ASSET_BUNDLE); qualquer outro tamanho é escalado do PNG e guardado num
+    cache LRU indexado por (asset, largura, altura).
+    Máscara e hitbox justo de cada variante do pacote são calculados na carga.
+    Com convert=False não precisa de janela (usado no replay sem tela)."""
+    def __init__(self, asset_dir=ASSET_DIR, max_scaled=ASSET_CACHE_SIZE, convert=True, bundle_path=ASSET_BUNDLE):
+        self.asset_dir = asset_dir
+        self.convert = convert
+        self.max_scaled = max_scaled
+        self.hits = 0
+        self.misses = 0
+        self._scaled = OrderedDict()
+        self.hitboxes = {} # (asset, largura, altura) -> (máscara, hitbox justo)
+        self.originals = {} # PNGs decodificados sob demanda (ex.: "alice")
+
+        self.prebaked = {}
+        if bundle_path:
+            self.prebaked = load_asset_bundle(asset_dir, bundle_path, convert)
+            if self.prebaked is None: # Primeira execução ou PNGs alterados
+                try:
+                    build_asset_bundle(asset_dir, bundle_path)
+                except OSError:
+                    pass # Disco só leitura: segue escalando a partir dos PNGs
+                self.prebaked = load_asset_bundle(asset_dir, bundle_path, convert) or {}
+
+        # Colisão: todas as variantes que o jogo usa, de uma vez (nada é gerado durante a partida)
+        for name, width, height in bundle_variants():
+            self.get_hitbox(name, width, height)
+
+    def get(self, name):
+        """Retorna a imagem original (já convertida) de um asset."""
+        image = self.originals.get(name)
+        if image is None:
+            image = pygame.image.load(os.path.join(self.asset_dir, name + ".png"))
+            if self.convert:
+                image = image.convert_alpha()
+            self.originals[name] = image
+        return image
+
+    def get_scaled(self, name, width, height):
+        """Retorna o asset redimensionado, reaproveitando variantes já escaladas."""
+        key = (name, width, height)
+        surface = self.prebaked.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        surface = self._scaled.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._scaled.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = pygame.transform.smoothscale(self.get(name), (width, height))
+        self._scaled[key] = surface
+        if len(self._scaled) > self.max_scaled:
+            self._scaled.popitem(last=False) # Descarta a variante menos usada
+        return surface
+
+    def get_hitbox(self, name, width, height):
+        """Máscara da variante escalada e o menor rect que contém seus pixels opacos.
+
+        Tamanhos fora do pacote são calculados no primeiro pedido e guardados."""
+        key = (name, width, height)
+        hitbox = self.hitboxes.get(key)
+        if hitbox is None:
+            mask = pygame.mask.from_surface(self.get_scaled(name, width, height))
+            rects = mask.get_bounding_rects()
+            box = rects[0].unionall(rects[1:]) if rects else pygame.Rect(0, 0, 0, 0)
+            hitbox = self.hitboxes[key] = (mask, box)
+        return hitbox
+
+    def pixel_narrowphase(self):
+        """Narrowphase para o SimState: confirma a colisão de retângulos pelas máscaras dos sprites.
+
+        O SimState só chama com os retângulos cheios já se tocando. Antes das
+        máscaras, compara os hitboxes justos (sem as bordas transparentes), que
+        descartam a maioria dos quase-toques sem olhar pixel. Use via
+        replay.narrowphase_for, que decide pelas flags da partida."""
+        hitboxes = self.hitboxes
+        get_hitbox = self.get_hitbox
+        def pixel_collision(player, obj):
+            key = ("alice", player.width, player.height)
+            player_mask, player_box = hitboxes.get(key) or get_hitbox(*key)
+            key = (OBJECT_ASSETS[obj.obj_type], obj.width, obj.height)
+            obj_mask, obj_box = hitboxes.get(key) or get_hitbox(*key)
+
+            dx, dy = int(obj.x) - player.x, int(obj.y) - player.y # Objeto relativo à Alice
+            if not (player_box.x < dx + obj_box.right and dx + obj_box.x < player_box.right
+                    and player_box.y < dy + obj_box.bottom and dy + obj_box.y < player_box.bottom):
+                return False
+            return player_mask.overlap(obj_mask, (dx, dy)) is not None
+        return pixel_collision
+
+    def stats(self):
+        """Contadores do cache de variantes escaladas."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'cached': len(self._scaled),
+            'prebaked': len(self.prebaked),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+# --- Cache de Textos Renderizados ---
+class TextRenderer:
+    """Guarda as superfícies de texto já renderizadas, indexadas por (fonte, texto, cor).
+
+    Números que mudam todo frame (ex.: o score) são montados a partir de um
+    atlas de dígitos pré-renderizados, sem chamar `font.render`.
+    """
+    DIGITS = "0123456789-"
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+        self._atlases = {} # (fonte, cor) -> {caractere: Surface}
+
+    def render(self, font, text, color):
+        """Equivalente a `font.render(text, True, color)`, mas com cache."""
+        key = (font, text, color)
+        surface = self._cache.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self._cache[key] = surface
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False) # Descarta o texto menos usado
+            self.evictions += 1
+        return surface
+
+    def _digit_atlas(self, font, color):
+        key = (font, color)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = {ch: font.render(ch, True, color) for ch in self.DIGITS}
+            self._atlases[key] = atlas
+        return atlas
+
+    def draw_number(self, surface, font, prefix, value, color, x, y):
+        """Desenha `prefix` + `value` centralizado em x (midtop), usando o atlas de dígitos."""
+        prefix_surface = self.render(font, prefix, color)
+        atlas = self._digit_atlas(font, color)
+        glyphs = [atlas[ch] for ch in str(value)]
+
+        width = prefix_surface.get_width() + sum(g.get_width() for g in glyphs)
+        height = max([prefix_surface.get_height()] + [g.get_height() for g in glyphs])
+        rect = pygame.Rect(0, 0, width, height)
+        rect.midtop = (x, y)
+
+        blits = [(prefix_surface, rect.topleft)]
+        pos_x = rect.x + prefix_surface.get_width()
+        for glyph in glyphs:
+            blits.append((glyph, (pos_x, rect.y)))
+            pos_x += glyph.get_width()
+        surface.blits(blits, False)
+        return rect
+
+    def stats(self):
+        """Contadores do cache de textos."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'cached': len(self._cache),
+            'atlases': len(self._atlases),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+# --- Sistema de Partículas (vetorizado) ---
+class ParticleSystem:
+    """Todas as partículas vivas em arrays NumPy. 100% procedural.
+
+    Cada explosão (`emit`) apenas acrescenta linhas aos arrays; `update`
+    integra todas as partículas num único passo e compacta as mortas.
+    `scale` e `max_particles` vêm do nível de qualidade.
+    """
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.scale = 1.0          # Fração de cada explosão que é criada
+        self.max_particles = None # Limite de partículas vivas (None = sem limite)
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.radius = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.uint16) # Índice na paleta
+
+        self._palette = [] # Cores (RGB) já usadas
+        self._stamps = {}  # (índice da cor, raio) -> Surface com o círculo
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, extra):
+        """Garante espaço para mais `extra` partículas (dobra a capacidade)."""
+        needed = self.count + extra
+        capacity = len(self.radius)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('pos', 'vel', 'radius', 'color'):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self.count] = old[:self.count]
+            setattr(self, name, grown)
+
+    def _color_index(self, color):
+        color = tuple(color)
+        if color not in self._palette:
+            self._palette.append(color)
+        return self._palette.index(color)
+
+    def emit(self, center, color, min_speed=1, max_speed=5, size=5, num_particles=10):
+        """Cria uma explosão de partículas em um ponto."""
+        num_particles = int(num_particles * self.scale)
+        if self.max_particles is not None:
+            num_particles = min(num_particles, self.max_particles - self.count)
+        if num_particles <= 0:
+            return
+        self._reserve(num_particles)
+        start, end = self.count, self.count + num_particles
+        self.pos[start:end] = center
+        self.vel[start:end] = np.random.uniform(-max_speed, max_speed, (num_particles, 2))
+        self.radius[start:end] = np.random.randint(min_speed, size + 1, num_particles)
+        self.color[start:end] = self._color_index(color)
+        self.count = end
+
+    def update(self, frames=1.0):
+        """Avança `frames` frames de 60 FPS (fracionário com outros FPS)."""
+        n = self.count
+        if not n:
+            return
+        self.pos[:n] += self.vel[:n] * frames
+        self.radius[:n] -= 0.1 * frames # Partículas encolhem e desaparecem
+
+        # Compacta as partículas vivas no início dos arrays
+        alive = self.radius[:n] > 0
+        live = int(np.count_nonzero(alive))
+        if live != n:
+            for arr in (self.pos, self.vel, self.radius, self.color):
+                arr[:live] = arr[:n][alive]
+            self.count = live
+
+    def clear(self):
+        self.count = 0
+
+    def _stamp(self, color_idx, radius):
+        """Círculo pré-renderizado para cada (cor, raio)."""
+        key = (color_idx, radius)
+        stamp = self._stamps.get(key)
+        if stamp is None:
+            stamp = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(stamp, self._palette[color_idx], (radius, radius), radius)
+            self._stamps[key] = stamp
+        return stamp
 
     def draw(self, surface):
-        for p in self.particles:
-            if p['radius'] > 0:
-                pygame.draw.circle(surface, p['color'], (int(p['pos'][0]), int(p['pos'][1])), int(p['radius']))
+        """Desenha as partículas e retorna o retângulo que as envolve (ou None)."""
+        n = self.count
+        if not n:
+            return None
+        radii = self.radius[:n].astype(np.int32)
+        visible = radii > 0
+        if not visible.any():
+            return None
+        radii = radii[visible]
+        xs = self.pos[:n, 0][visible].astype(np.int32)
+        ys = self.pos[:n, 1][visible].astype(np.int32)
+        colors = self.color[:n][visible]
+        stamp = self._stamp
+        surface.blits([(stamp(c, r), (x - r, y - r)) for c, r, x, y in
+                       zip(colors.tolist(), radii.tolist(), xs.tolist(), ys.tolist())], False)
+
+        left, top = int((xs - radii).min()), int((ys - radii).min())
+        right, bottom = int((xs + radii).max()), int((ys + radii).max())
+        return pygame.Rect(left, top, right - left, bottom - top).clip(surface.get_rect())
 
 # --- Classe do Jogador ("Alice") ---
 class Player(pygame.sprite.Sprite):
-    def __init__(self):
+    """Visual da Alice. Posição e efeitos vêm do SimPlayer da simulação."""
+    def __init__(self, assets, sim_player):
         super().__init__()
+        self.sim_player = sim_player
 
-        # Carrega sprites originais
-        alice_raw = pygame.image.load("assets/alice.png").convert_alpha()
-
-        # ===== TAMANHOS =====
-        self.size_normal = 50
-        self.size_small = 30
-        self.size_big = 80
-
-        # ===== REDIMENSIONAMENTO =====
-        self.sprite_normal = pygame.transform.smoothscale(
-            alice_raw,
-            self._scale_keep_ratio(alice_raw, self.size_normal)
-        )
-        self.sprite_small = pygame.transform.smoothscale(
-            alice_raw,
-            self._scale_keep_ratio(alice_raw, self.size_small)
-        )
-        self.sprite_big = pygame.transform.smoothscale(
-            alice_raw,
-            self._scale_keep_ratio(alice_raw, self.size_big)
-        )
+        # ===== UM SPRITE POR EFEITO (TAMANHOS MANTÊM A PROPORÇÃO) =====
+        # (as máscaras de colisão ficam só no AssetManager, lidas pelo narrowphase)
+        self.sprites = {effect: assets.get_scaled("alice", *size) for effect, size in PLAYER_SIZES.items()}
 
         # Começa com o sprite normal
-        self.image = self.sprite_normal
-        self.rect = self.image.get_rect()
-
-        # Posição inicial
-        self.rect.centerx = SCREEN_WIDTH // 2
-        self.rect.centery = PLAYER_START_Y
-
-        # Movimento
-        self.speed = 7
-
-        # Efeitos
         self.effect = None
-        self.effect_timer = 0
-        self.effect_duration = 5000
-        self.score_multiplier = 1
-
-    # =============== MANUTENÇÃO DO ASPECT RATIO ===============
-    def _scale_keep_ratio(self, img, target_height):
-        """Redimensiona mantendo proporção original."""
-        width = img.get_width()
-        height = img.get_height()
-
-        scale_factor = target_height / height
-        new_width = int(width * scale_factor)
-        new_height = int(height * scale_factor)
-
-        return (new_width, new_height)
+        self.image = self.sprites[None]
+        self.capture()
+        self._update_sprite()
 
     # ========================== ATUALIZAÇÃO ==========================
-    def update(self):
-        keys = pygame.key.get_pressed()
-
-        if keys[pygame.K_LEFT]:
-            self.rect.x -= self.speed
-        if keys[pygame.K_RIGHT]:
-            self.rect.x += self.speed
+    def capture(self):
+        """Guarda a posição antes do passo de simulação (base da interpolação)."""
+        self.prev_x = self.sim_player.x
 
-        # Limites da tela
-        self.rect.left = max(0, self.rect.left)
-        self.rect.right = min(SCREEN_WIDTH, self.rect.right)
-
-        # Timer de efeitos
-        if self.effect:
-            now = pygame.time.get_ticks()
-            if now - self.effect_timer > self.effect_duration:
-                self.reset_size()
-
-        # Atualiza sprite visual
-        self._update_sprite()
+    def update(self, alpha=1.0):
+        # Sprite só muda com o efeito; a posição, entre o passo anterior (alpha = 0) e o atual (alpha = 1)
+        if self.sim_player.effect != self.effect:
+            self._update_sprite()
+        self.rect.x = int(self.prev_x + (self.sim_player.x - self.prev_x) * alpha)
 
     # ========================== TROCA DE SPRITES ==========================
     def _update_sprite(self):
-        center = self.rect.center
-
-        if self.effect == "shrink":
-            self.image = self.sprite_small
-        elif self.effect == "grow":
-            self.image = self.sprite_big
+        """Troca sprite e rect para o efeito atual (o tamanho e o y mudam junto)."""
+        self.effect = effect = self.sim_player.effect
+        self.image = self.sprites[effect]
+        self.rect = pygame.Rect(self.sim_player.rect)
+
+# --- Obstáculos e Itens (struct-of-arrays) ---
+class ObjectStore:
+    """Visual de todos os SimObjects em arrays NumPy: um registro por objeto, sem sprites.
+
+    Cada objeto sobe com velocidade constante, então a posição de todos sai
+    de uma conta só: y = y no spawn - velocidade * (frames desde o spawn).
+    `update` move, interpola e descarta (compactando os arrays) os que
+    saíram pelo topo; `draw` desenha os visíveis numa única chamada de blits.
+    """
+    FIELDS = ('ids', 'x', 'y0', 't0', 'speed', 'height', 'image', 'draw_y')
+
+    def __init__(self, assets, capacity=64):
+        self.assets = assets
+        self.count = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)     # SimObject.id (ordem de spawn)
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y0 = np.zeros(capacity, dtype=np.float64)    # y no spawn
+        self.t0 = np.zeros(capacity, dtype=np.float64)    # SimState.frames no spawn
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.height = np.zeros(capacity, dtype=np.int32)
+        self.image = np.zeros(capacity, dtype=np.int32)   # Índice em _images
+        self.draw_y = np.zeros(capacity, dtype=np.int32)  # y do último update
+
+        self._images = []      # Superfícies escaladas (vêm do cache do AssetManager)
+        self._image_index = {} # (tipo, largura, altura) -> índice em _images
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, extra):
+        """Garante espaço para mais `extra` objetos (dobra a capacidade)."""
+        needed = self.count + extra
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:self.count] = old[:self.count]
+            setattr(self, name, grown)
+
+    def _image_for(self, obj_type, width, height):
+        key = (obj_type, width, height)
+        index = self._image_index.get(key)
+        if index is None:
+            index = self._image_index[key] = len(self._images)
+            # Cópia com RLE: o blit pula as áreas transparentes (~2,5x mais rápido com alpha)
+            image = self.assets.get_scaled(OBJECT_ASSETS[obj_type], width, height).copy()
+            image.set_alpha(255, pygame.RLEACCEL)
+            self._images.append(image)
+        return index
+
+    def add(self, sim_obj, frames):
+        """Registra um SimObject recém-criado (`frames` = SimState.frames no spawn)."""
+        self._reserve(1)
+        i = self.count
+        self.ids[i] = sim_obj.id
+        self.x[i] = int(sim_obj.x)
+        self.y0[i] = sim_obj.y
+        self.t0[i] = frames
+        self.speed[i] = sim_obj.speed
+        self.height[i] = sim_obj.height
+        self.image[i] = self._image_for(sim_obj.obj_type, sim_obj.width, sim_obj.height)
+        self.draw_y[i] = int(sim_obj.y)
+        self.count = i + 1
+
+    def remove(self, sim_obj):
+        """Tira um objeto antes da hora (ex.: item coletado), mantendo a ordem de spawn."""
+        n = self.count
+        found = np.flatnonzero(self.ids[:n] == sim_obj.id)
+        if not found.size:
+            return
+        i = int(found[0])
+        for name in self.FIELDS:
+            arr = getattr(self, name)
+            arr[i:n - 1] = arr[i + 1:n]
+        self.count = n - 1
+
+    def update(self, frames):
+        """Posiciona todos no instante `frames` (fracionário: interpola entre passos)."""
+        n = self.count
+        if not n:
+            return
+        y = self.y0[:n] - self.speed[:n] * (frames - self.t0[:n])
+        self.draw_y[:n] = y # Trunca como int()
+
+        # Descarta os que saíram pelo topo, compactando os vivos no início dos arrays
+        alive = self.draw_y[:n] + self.height[:n] >= 0
+        live = int(np.count_nonzero(alive))
+        if live != n:
+            for name in self.FIELDS:
+                arr = getattr(self, name)
+                arr[:live] = arr[:n][alive]
+            self.count = live
+
+    def clear(self):
+        self.count = 0
+
+    def draw(self, surface, offset_x=0):
+        """Desenha os objetos que já entraram na tela, em ordem de spawn (deslocados de `offset_x`)."""
+        n = self.count
+        if not n:
+            return
+        visible = self.draw_y[:n] < surface.get_height()
+        xs = self.x[:n][visible] + offset_x
+        # Gerador em vez de lista: as tuplas vivem só durante o blit de cada objeto
+        surface.blits(zip(map(self._images.__getitem__, self.image[:n][visible].tolist()),
+                          zip(xs.tolist(), self.draw_y[:n][visible].tolist())), False)
+
+
+# --- Fundo: Parallax Starfield ---
+class Starfield:
+    """Estrelas pré-desenhadas em camadas que se repetem na vertical.
+
+    Cada camada agrupa as estrelas de uma faixa de velocidade numa superfície
+    do tamanho da tela (com colorkey e RLE). Por frame o custo é um fill e
+    duas blits por camada, qualquer que seja a quantidade de estrelas.
+    Com `shown_layers` menor (qualidade baixa) as camadas do fundo não são desenhadas."""
+    def __init__(self, star_count=STAR_COUNT, speeds=STAR_LAYER_SPEEDS):
+        self.speeds = speeds
+        self.offsets = [0.0] * len(speeds)
+        self.layers = [self._bake(star_count // len(speeds)) for _ in speeds]
+        self.shown_layers = len(speeds)
+        self._erasers = {} # Camada -> cópia preta (para apagar as estrelas sem pintar a tela)
+        self._drawn = {}   # Camada -> y em que foi desenhada por redraw()
+
+    def _bake(self, count):
+        layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        layer.fill(STAR_COLORKEY)
+
+        # Um carimbo por (tamanho, cor); as estrelas saem todas numa única chamada de blits
+        colors = (WHITE, LIGHT_GRAY, DIM_GRAY) # Cores e tamanhos variados para ilusão de profundidade
+        stamps = []
+        for size in range(1, 5):
+            for color in colors:
+                stamp = pygame.Surface((size, size))
+                stamp.fill(color)
+                stamps.append(stamp)
+        kinds = np.random.randint(0, len(stamps), count)
+        sizes = kinds // len(colors) + 1
+        xs = np.random.randint(0, SCREEN_WIDTH - sizes + 1)
+        ys = np.random.randint(0, SCREEN_HEIGHT, count)
+
+        stars = []
+        for kind, size, x, y in zip(kinds.tolist(), sizes.tolist(), xs.tolist(), ys.tolist()):
+            stars.append((stamps[kind], (x, y)))
+            if y + size > SCREEN_HEIGHT: # Continua no topo: a camada emenda sem corte
+                stars.append((stamps[kind], (x, y - SCREEN_HEIGHT)))
+        layer.blits(stars, doreturn=False)
+
+        layer.set_colorkey(STAR_COLORKEY, pygame.RLEACCEL)
+        return layer.convert()
+
+    def reset(self):
+        self.offsets = [random.uniform(0, SCREEN_HEIGHT) for _ in self.speeds]
+        self._drawn.clear()
+
+    def update(self, frames=1.0):
+        # As estrelas sobem (Alice está caindo)
+        for i, speed in enumerate(self.speeds):
+            self.offsets[i] = (self.offsets[i] + speed * frames) % SCREEN_HEIGHT
+
+    def draw(self, surface, color=None, layers=None):
+        """Pinta o fundo inteiro: a cor da fase (se dada) e as camadas com seu deslocamento.
+
+        `layers` (um slice, do fundo para a frente) escolhe as camadas; por padrão, as `shown_layers` da frente."""
+        if color is not None:
+            surface.fill(color)
+        if layers is None:
+            layers = slice(len(self.layers) - self.shown_layers, None)
+        for layer, offset in zip(self.layers[layers], self.offsets[layers]):
+            y = -int(offset)
+            for x in range(0, surface.get_width(), SCREEN_WIDTH): # Telas mais largas (split-screen)
+                surface.blit(layer, (x, y))
+                surface.blit(layer, (x, y + SCREEN_HEIGHT))
+
+    def _eraser(self, i):
+        eraser = self._erasers.get(i)
+        if eraser is None:
+            mask = pygame.mask.from_surface(self.layers[i]) # Pixels das estrelas (fora do colorkey)
+            eraser = mask.to_surface(setcolor=BLACK, unsetcolor=STAR_COLORKEY)
+            eraser.set_colorkey(STAR_COLORKEY, pygame.RLEACCEL)
+            eraser = self._erasers[i] = eraser.convert()
+        return eraser
+
+    def redraw(self, surface, layers):
+        """Move as camadas `layers` (um slice) sobre um fundo preto liso sem repintar a tela.
+
+        Apaga cada camada onde ela foi desenhada da última vez (blit da cópia
+        preta, só os pixels das estrelas) e a desenha na posição nova. A tela
+        tem que estar preta depois de um reset() e só receber por cima coisas
+        opacas que são redesenhadas a cada frame."""
+        indexes = range(len(self.layers))[layers]
+        width = surface.get_width()
+        for i in indexes:
+            y = self._drawn.get(i)
+            if y is not None:
+                eraser = self._eraser(i)
+                for x in range(0, width, SCREEN_WIDTH):
+                    surface.blit(eraser, (x, y))
+                    surface.blit(eraser, (x, y + SCREEN_HEIGHT))
+        for i in indexes:
+            y = self._drawn[i] = -int(self.offsets[i])
+            for x in range(0, width, SCREEN_WIDTH):
+                surface.blit(self.layers[i], (x, y))
+                surface.blit(self.layers[i], (x, y + SCREEN_HEIGHT))
+
+# --- Instrumentação (Profiler de Frame) ---
+class FrameProfiler:
+    """Mede o tempo de cada fase do frame e mantém percentis móveis (p50/p95/p99).
+
+    Cada `lap(nome)` atribui ao nome o tempo desde o lap anterior. F3 liga e
+    desliga o overlay; F10 grava um cProfile dos próximos frames.
+    """
+    def __init__(self, trace_path=None, window=PROFILER_WINDOW):
+        self.trace_path = trace_path
+        self.window = window
+        self.samples = {} # nome -> deque com os últimos tempos (ms)
+        self.trace = deque(maxlen=PROFILER_TRACE_FRAMES)
+        self.show_overlay = True
+        self.frame_count = 0
+        self.info = {} # Linhas extras do overlay (nome -> valor), ex.: nível de qualidade
+        self._current = {}
+        self._frame_start = self._last = time.perf_counter()
+        self._overlay = None
+        self._capture = None
+        self._capture_left = 0
+
+    # ---------- Medição ----------
+    def start_frame(self):
+        self._current = {}
+        self._frame_start = self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self._current[name] = self._current.get(name, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self):
+        current = self._current
+        current['frame'] = (time.perf_counter() - self._frame_start) * 1000
+        for name, ms in current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(ms)
+        self.trace.append(current)
+        self.frame_count += 1
+
+        if self._capture is not None:
+            self._capture_left -= 1
+            if self._capture_left <= 0:
+                self.stop_capture()
+
+    def percentiles(self, name):
+        values = sorted(self.samples.get(name, ()))
+        if not values:
+            return (0.0, 0.0, 0.0)
+        last = len(values) - 1
+        return tuple(values[int(round(q * last))] for q in (0.50, 0.95, 0.99))
+
+    def summary(self):
+        return {name: dict(zip(('p50', 'p95', 'p99'), self.percentiles(name))) for name in self.samples}
+
+    # ---------- cProfile ----------
+    def start_capture(self, frames=PROFILE_CAPTURE_FRAMES):
+        if self._capture is None:
+            self._capture = cProfile.Profile()
+            self._capture_left = frames
+            self._capture.enable()
+
+    def stop_capture(self):
+        self._capture.disable()
+        path = time.strftime("profile_%Y%m%d_%H%M%S.prof")
+        self._capture.dump_stats(path)
+        print(f"cProfile salvo em {path} (abra com: python -m pstats {path})")
+        self._capture = None
+
+    def handle_key(self, key):
+        if key == pygame.K_F3:
+            self.show_overlay = not self.show_overlay
+        elif key == pygame.K_F10:
+            self.start_capture()
+
+    # ---------- Saída ----------
+    def draw(self, surface, font):
+        """Desenha a tabela de percentis no canto superior esquerdo. Retorna o rect."""
+        if not self.show_overlay:
+            return None
+        if self._overlay is None or self.frame_count % PROFILER_REFRESH == 0:
+            lines = [f"{'fase':<16}{'p50':>7}{'p95':>7}{'p99':>7}"]
+            for name in self.samples:
+                p50, p95, p99 = self.percentiles(name)
+                lines.append(f"{name:<16}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+            for name, value in self.info.items():
+                lines.append(f"{name:<16}{value:>21}")
+            rendered = [font.render(line, True, YELLOW) for line in lines]
+            height = sum(r.get_height() for r in rendered)
+            self._overlay = pygame.Surface((max(r.get_width() for r in rendered) + 8, height + 8))
+            self._overlay.set_alpha(200)
+            y = 4
+            for r in rendered:
+                self._overlay.blit(r, (4, y))
+                y += r.get_height()
+        return surface.blit(self._overlay, (0, 0))
+
+    def dump(self, path=None):
+        """Grava o trace por frame: CSV (uma linha por frame) ou JSON (com o resumo)."""
+        path = path or self.trace_path
+        if not path:
+            return
+        names = list(self.samples)
+        if path.endswith('.csv'):
+            with open(path, 'w') as f:
+                f.write(",".join(names) + "\n")
+                for frame in self.trace:
+                    f.write(",".join(f"{frame.get(name, 0.0):.4f}" for name in names) + "\n")
         else:
-            self.image = self.sprite_normal
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(), 'frames': list(self.trace)}, f)
+
+
+# --- Sessão (um jogador) ---
+class Session:
+    """Uma partida independente: simulação, objetos, partículas, score e canvas.
+
+    No split-screen cada jogador tem a sua sessão, desenhada lado a lado na
+    mesma janela. Cache de assets e de textos, paleta do fundo e estrelas
+    são do Game e servem a todas as sessões."""
+    def __init__(self, game, index, controls):
+        self.game = game
+        self.index = index
+        self.controls = controls # (tecla para a esquerda, tecla para a direita)
+        self.viewport = pygame.Rect(index * SCREEN_WIDTH, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+        # Desenha na sua faixa do canvas do Game
+        self.canvas = game.canvas.subsurface(self.viewport)
+
+        # Regras do jogo (spawn, movimento, score, colisões)
+        self.sim = SimState(narrowphase=game.narrowphase)
+        self.sim.profiler = game.profiler
+        self.objects = ObjectStore(game.assets) # Obstáculos e itens, em arrays
+        self.particles = ParticleSystem() # Efeitos de partículas
+        self.player = Player(game.assets, self.sim.player)
+
+        self.playing = False
+        self.score = 0
+        self.game_speed = 0 # Velocidade inicial para objetos caindo
+        self.new_record = False
+        self.shake_duration = 0
+        self.recorder = None
+        self.replay_inputs = None
+
+        # Telemetria (se o Game tiver): id da partida, próxima amostra de score e fase atual
+        self.telemetry_id = None
+        self.next_sample_ms = 0
+        self.phase = 1
 
-        self.rect = self.image.get_rect(center=center)
+    def new_game(self):
+        """Reseta a sessão para um novo jogo (sem alocar sprites nem superfícies)."""
+        game = self.game
+        # A seed é sorteada aqui (ou vem do replay) para a partida poder ser reproduzida
+        if game.replay:
+            seed = game.replay.seed
+            self.replay_inputs = game.replay.inputs()
+        else:
+            seed = random.getrandbits(64)
+        if game.record:
+            self.recorder = ReplayRecorder(seed, game.collision_flags)
+        if self.playing:
+            self.end_telemetry('restart')
+        self.sim.reset(seed)
+        self.score = 0
+        self.new_record = False
+        self.game_speed = INITIAL_GAME_SPEED
+        self.shake_duration = 0
+        self.phase = 1
+
+        telemetry = game.telemetry
+        if telemetry:
+            self.telemetry_id = telemetry.start_session(player=self.index + 1, players=len(game.sessions), seed=seed)
+            self.next_sample_ms = SCORE_SAMPLE_MS
+
+        self.objects.clear()
+        self.particles.clear()
+
+        # Jogador
+        self.player.capture()
+        self.player.update()
+        self.playing = True
+
+    def read_input(self, keys):
+        left, right = self.controls
+        inp = 0
+        if keys[left]:
+            inp |= INPUT_LEFT
+        if keys[right]:
+            inp |= INPUT_RIGHT
+        return inp
+
+    def advance(self, steps, keys):
+        """Roda `steps` passos de simulação com a entrada do teclado (ou do replay)."""
+        if self.game.replay:
+            inputs = self.next_replay_inputs(steps)
+        else:
+            inputs = (self.read_input(keys),) * steps
+
+        last = len(inputs) - 1
+        for i, inp in enumerate(inputs):
+            if not self.playing:
+                break
+            if i == last:
+                self.capture_positions()
+            if self.recorder:
+                self.recorder.record(inp)
+            self.apply_sim_events(step(self.sim, inp))
+        self.score = self.sim.score
+        self.game_speed = self.sim.game_speed
+        if self.game.telemetry and self.playing:
+            self.sample_telemetry()
+
+    # ---------- Telemetria ----------
+    def sample_telemetry(self):
+        """Score ao longo do tempo (uma amostra a cada SCORE_SAMPLE_MS de jogo) e troca de fase."""
+        telemetry = self.game.telemetry
+        sim = self.sim
+        while sim.time_ms >= self.next_sample_ms:
+            telemetry.emit('score', session=self.telemetry_id, time_ms=self.next_sample_ms, score=sim.score,
+                           speed=round(sim.game_speed, 3), effect=sim.player.effect)
+            self.next_sample_ms += SCORE_SAMPLE_MS
+        phase = sim.phase
+        if phase != self.phase:
+            telemetry.emit('phase', session=self.telemetry_id, time_ms=round(sim.time_ms, 1), phase=phase,
+                           previous=self.phase, score=sim.score)
+            self.phase = phase
+
+    def end_telemetry(self, reason):
+        if self.game.telemetry and self.telemetry_id:
+            self.game.telemetry.emit('session_end', session=self.telemetry_id, reason=reason,
+                                     time_ms=round(self.sim.time_ms, 1), score=self.sim.score, phase=self.sim.phase)
+            self.telemetry_id = None
+
+    def capture_positions(self):
+        """Guarda a posição da Alice antes do último passo do frame, para interpolar o desenho.
+
+        Os objetos não precisam: o ObjectStore calcula a posição em qualquer instante."""
+        self.player.capture()
+
+    def next_replay_inputs(self, count):
+        """As próximas `count` entradas gravadas."""
+        inputs = []
+        for _ in range(count):
+            inp = next(self.replay_inputs, None)
+            if inp is None:
+                if not inputs: # Fim da gravação sem morte (partida interrompida)
+                    self.playing = False
+                break
+            inputs.append(inp)
+        return inputs
+
+    def apply_sim_events(self, events):
+        """Reflete nos sprites, efeitos e telemetria os eventos de um passo da simulação."""
+        telemetry = self.game.telemetry
+        for kind, obj in events:
+            if kind == 'spawn':
+                self.objects.add(obj, self.sim.frames)
+
+            # 'despawn': o ObjectStore descarta sozinho quem sai pelo topo
+
+            elif kind == 'pickup':
+                center = (obj.x + obj.width / 2, obj.y + obj.height / 2)
+                color = GREEN if obj.obj_type == 'shrink' else PURPLE
+                self.particles.emit(center, color, min_speed=1, max_speed=4, size=6, num_particles=PARTICLES_POWER_UP)
+                self.objects.remove(obj)
+                if telemetry:
+                    telemetry.emit('pickup', session=self.telemetry_id, time_ms=round(self.sim.time_ms, 1), effect=obj.obj_type,
+                                   x=int(obj.x), y=int(obj.y), score=self.sim.score)
+
+            elif kind == 'death':
+                # Game Over!
+                player = self.sim.player
+                center = (player.x + player.width / 2, player.y + player.height / 2)
+                self.particles.emit(center, RED, size=8, num_particles=PARTICLES_GAME_OVER)
+                self.shake_screen(300) # Tremer a tela por 300ms
+                if telemetry:
+                    self.sample_telemetry()
+                    telemetry.emit('death', session=self.telemetry_id, time_ms=round(self.sim.time_ms, 1), cause=obj.obj_type,
+                                   object=[int(obj.x), int(obj.y), obj.width, obj.height],
+                                   player=list(player.rect), effect=player.effect, score=self.sim.score)
+                    self.end_telemetry('death')
+                self.playing = False
+                self.score = self.sim.score
+                replay_name = self.save_replay() if self.recorder else None
+                if not self.game.replay: # O replay não mexe no placar
+                    self.save_high_score(replay_name)
+
+    def save_replay(self):
+        """Grava a partida que acabou em REPLAY_DIR (data_hora_score.rpl). Retorna o nome do arquivo.
+
+        O disco fica com a thread de escrita do ScoreStore (antes da entrada do placar que cita o replay)."""
+        replay = self.recorder.finish(self.score)
+        self.recorder = None
+        suffix = f"_p{self.index + 1}" if len(self.game.sessions) > 1 else ""
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{self.score}{suffix}.rpl"
+        self.game.scores.save_file(os.path.join(REPLAY_DIR, name), replay.to_bytes())
+        return name
+
+    def save_high_score(self, replay_name=None):
+        """Registra a partida no placar (o disco é escrito pela thread do ScoreStore)."""
+        game = self.game
+        self.new_record = self.score > game.high_score
+        game.scores.submit(self.score, get_phase(self.score), replay_name)
+        game.high_score = game.scores.best()
 
-    # ========================== POWER UPS ==========================
-    def shrink(self):
-        self.effect = "shrink"
-        self.effect_timer = pygame.time.get_ticks()
-        self.score_multiplier = 1
+    def shake_screen(self, duration):
+        """Ativa o efeito de tremor na tela (só nesta sessão)."""
+        self.shake_duration = duration
+        event = pygame.event.Event(self.game.SCREEN_SHAKE_EVENT, session=self.index)
+        pygame.time.set_timer(event, duration, 1) # Dispara uma vez
+
+    def update(self, alpha, frames):
+        # Sprites entre os dois últimos passos; efeitos pelo tempo decorrido
+        game = self.game
+        self.player.update(alpha)
+        self.objects.update(self.sim.frames - 1 + alpha) # Todos os objetos numa conta só
+        game._lap('sprites_update')
+        self.particles.update(frames) # Integra todas as partículas de uma vez
+        game._lap('particles_update')
+
+    def draw(self):
+        """Desenha a sessão na sua faixa do canvas: sprites, partículas e HUD."""
+        game = self.game
+        canvas = self.canvas
+        # O fundo (cor e estrelas) já foi pintado pelo Game em todas as sessões
+        # Desenha em camadas: objetos (uma chamada de blits), jogador.
+        # Os objetos vão direto no canvas do Game, como as estrelas: imagens RLE com um destino só
+        self.objects.draw(game.canvas, self.viewport.x)
+        canvas.blit(self.player.image, self.player.rect)
+        game._lap('sprite_draw')
+
+        self.particles.draw(canvas) # Desenha partículas por cima
+        game._lap('particle_draw')
 
-    def grow(self):
-        self.effect = "grow"
-        self.effect_timer = pygame.time.get_ticks()
-        self.score_multiplier = 2
+        # Desenha HUD
+        game.text.draw_number(canvas, game.font_small, "Score: ", self.score, WHITE, SCREEN_WIDTH / 2, 10)
+        game.draw_text(f"High Score: {game.high_score}", game.font_tiny, LIGHT_GRAY, SCREEN_WIDTH / 2, 40, canvas)
+        game.draw_text(f"Fase: {get_phase(self.score)}", game.font_small, YELLOW, SCREEN_WIDTH / 2, 90, canvas)
 
-    def reset_size(self):
-        self.effect = None
-        self.effect_timer = 0
-        self.score_multiplier = 1
+        player = self.sim.player
+        if player.effect:
+            powerup_text = f"Efeito: {player.effect.upper()} ({int((EFFECT_DURATION - (self.sim.time_ms - player.effect_timer)) / 1000) + 1}s)"
+            color = PLAYER_COLOR_GROW if player.effect == 'grow' else PLAYER_COLOR_SHRINK
+            game.draw_text(powerup_text, game.font_tiny, color, SCREEN_WIDTH / 2, 65, canvas)
 
-# --- Classe dos Obstáculos e Itens ---
-class TunnelObject(pygame.sprite.Sprite):
-    def __init__(self, obj_type, speed):
-        super().__init__()
-        self.obj_type = obj_type
-        self.speed = speed
-        
-        # ========= DEFINIÇÕES DOS TAMANHOS PROPORCIONAIS ========= #
-        if self.obj_type == 'danger':
-            width = random.randint(40, 100)
-            height = random.randint(15, 30)
-            image_path = "assets/obstaculo.png"
-
-        elif self.obj_type == 'shrink':
-            width = height = 28
-            image_path = "assets/beba_me.png"  # diminui Alice
-
-        elif self.obj_type == 'grow':
-            width = height = 32
-            image_path = "assets/coma_me.png"  # aumenta Alice
-
-        # ========= CARREGAR A IMAGEM ========= #
-        original_img = pygame.image.load(image_path).convert_alpha()
-
-        # ========= ESCALAR A IMAGEM PARA O TAMANHO DEFINIDO ========= #
-        self.image = pygame.transform.smoothscale(original_img, (width, height))
-
-        # ========= DEFINIR RECT ========= #
-        self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, SCREEN_WIDTH - width)
-        self.rect.y = SCREEN_HEIGHT + random.randint(20, 150)
-
-    def update(self):
-        self.rect.y -= self.speed
-        if self.rect.bottom < 0:
-            self.kill()
-
-# --- Classe dos Elementos de Fundo (Parallax Starfield) ---
-class BackgroundElement(pygame.sprite.Sprite):
-    def __init__(self):
-        super().__init__()
-        
-        # Partícula/Estrela simples
-        size = random.randint(1, 4)
-        self.image = pygame.Surface((size, size))
-        # Cores variadas para ilusão de profundidade
-        self.image.fill(random.choice([WHITE, LIGHT_GRAY, DIM_GRAY])) 
-        self.rect = self.image.get_rect()
-            
-        self.rect.x = random.randint(0, SCREEN_WIDTH - self.rect.width)
-        self.rect.y = random.randint(0, SCREEN_HEIGHT)
-        
-        self.speed = random.uniform(1, 6) # Velocidades variadas para parallax
+        if len(game.sessions) > 1:
+            game.draw_text(f"Jogador {self.index + 1}", game.font_tiny, LIGHT_GRAY, SCREEN_WIDTH / 2, SCREEN_HEIGHT - 30, canvas)
+            if not self.playing: # Os outros jogadores continuam
+                game.draw_text("FIM DE JOGO", game.font_main, RED, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 24, canvas)
+        game._lap('hud')
 
-    def update(self):
-        self.rect.y -= self.speed
-        if self.rect.bottom < 0:
-            self.rect.y = SCREEN_HEIGHT + random.randint(0, 50)
-            self.rect.x = random.randint(0, SCREEN_WIDTH - self.rect.width)
-            self.speed = random.uniform(1, 6) # Reinicia velocidade
 
 # --- Classe Principal do Jogo ---
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    def __init__(self, profiler=None, replay=None, replay_speed=1.0, record=True, fps=FPS, measure_startup=False,
+                 players=1, telemetry=None, quality=None, frame_budget=None, scores=None):
+        # Marcos da inicialização (mostrados com --measure-startup)
+        self.measure_startup = measure_startup
+        self.startup_marks = [('imports', time.perf_counter())]
+
+        # Só os módulos usados (sem mixer nem joystick)
+        pygame.display.init()
+        pygame.font.init()
+        # Split-screen: uma faixa de SCREEN_WIDTH por jogador
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH * players, SCREEN_HEIGHT))
         pygame.display.set_caption(GAME_TITLE)
         self.clock = pygame.time.Clock()
-        self.font_main = pygame.font.Font(pygame.font.match_font('arial'), 48)
-        self.font_small = pygame.font.Font(pygame.font.match_font('arial'), 24)
-        self.font_tiny = pygame.font.Font(pygame.font.match_font('arial'), 18)
+        self.mark_startup('pygame')
+
+        font_path = resolve_font_path()
+        self.font_main = pygame.font.Font(font_path, 48)
+        self.font_small = pygame.font.Font(font_path, 24)
+        self.font_tiny = pygame.font.Font(font_path, 18)
+        self.mark_startup('fontes')
+
+        # Todos os sprites são carregados do disco uma única vez (e servem a todas as sessões)
+        self.assets = AssetManager()
+        self.text = TextRenderer()
+        self.mark_startup('assets')
+
+        # O jogo é desenhado num canvas fixo (uma faixa por sessão), levado à tela com offset no shake
+        self.canvas = pygame.Surface((SCREEN_WIDTH * players, SCREEN_HEIGHT)).convert()
+
+        # Fundo: paleta com a cor de cada score (preenchida no primeiro uso) e estrelas em camadas
+        self.background_palette = [None] * (PHASE_3_SCORE + PHASE_3_FADE + 1)
+        self.starfield = Starfield()
+        self.mark_startup('fundo')
         
         self.running = True
-        self.game_state = 'START' # Estados: START, PLAYING, GAME_OVER
-        
-        self.score = 0
-        self.high_score = 0
-        self.game_speed = 0 # Velocidade inicial para objetos caindo
-        self.load_high_score()
-        
+        self.game_state = 'START' # Estados: START, PLAYING, GAME_OVER (este quando todas as sessões acabam)
+        self.idle_frame_at = 0 # Ticks do próximo frame de animação numa tela parada
+        self.start_texts = []  # Textos fixos da tela de início: (superfície opaca, rect)
+        self.start_prompt = None # Texto piscando da tela de início: (superfície opaca, rect)
+        self.fps = fps # Limite do render (0 = sem limite)
+        self.sim_accumulator = 0.0 # Tempo ainda não simulado (ms), sempre < FRAME_MS
+
+        # Placar (top-N): carrega só o snapshot e grava em segundo plano (`scores` troca os arquivos, ex.: benchmark)
+        self.scores = scores or ScoreStore()
+        self.high_score = self.scores.best()
+
+        # Instrumentação e telemetria opcionais (None = desligadas)
+        self.profiler = profiler
+        self.telemetry = telemetry
+
+        # Replay: com `replay` a entrada vem do arquivo, senão a partida é gravada
+        self.replay = replay
+        self.replay_speed = replay_speed # 2 = dobro da velocidade, 0.5 = câmera lenta
+        self.record = record and replay is None
+
         # Eventos customizados
-        self.SPAWN_OBJECT_EVENT = pygame.USEREVENT + 1
         self.SCREEN_SHAKE_EVENT = pygame.USEREVENT + 2
-        self.shake_duration = 0
-        
-    def load_high_score(self):
-        """Carrega o high score do arquivo."""
-        if os.path.exists(HIGH_SCORE_FILE):
-            try:
-                with open(HIGH_SCORE_FILE, 'r') as f:
-                    self.high_score = int(f.read())
-            except ValueError:
-                self.high_score = 0
-        else:
-            self.high_score = 0
-
-    def save_high_score(self):
-        """Salva o high score se for maior que o anterior."""
-        if self.score > self.high_score:
-            self.high_score = self.score
-            with open(HIGH_SCORE_FILE, 'w') as f:
-                f.write(str(self.high_score))
-
-    def get_current_phase(self):
-        s = self.score
-        if s < 2500:
-            return 1
-        elif s < 8000:
-            return 2
+
+        # Tudo que uma partida usa é criado uma vez e reaproveitado no restart
+        # Colisão: a do arquivo no replay (as mesmas flags que a re-simulação sem tela lê), senão a configurada
+        if replay:
+            self.collision_flags = replay.flags
         else:
-            return 3
+            self.collision_flags = FLAG_PIXEL_COLLISIONS if PIXEL_PERFECT_COLLISIONS else 0
+        self.narrowphase = narrowphase_for(self.collision_flags, self.assets)
+        self.sessions = []
+        for i in range(players):
+            self.sessions.append(Session(self, i, PLAYER_CONTROLS[i]))
+
+        # Qualidade adaptativa: `quality` fixa um nível (índice em QUALITY_LEVELS), None = automática.
+        # O orçamento padrão é o intervalo do limite de FPS
+        budget = frame_budget or 1000 / (fps or FPS)
+        self.quality = QualityController(budget, quality)
+        self.apply_quality()
+        self.mark_startup('jogo')
+
+    def apply_quality(self):
+        """Aplica as configurações do nível de qualidade atual (estrelas, partículas, shake)."""
+        settings = self.quality.settings
+        self.starfield.shown_layers = min(settings['star_layers'], len(self.starfield.layers))
+        for session in self.sessions:
+            session.particles.scale = settings['particle_scale']
+            session.particles.max_particles = settings['max_particles']
+        if self.profiler:
+            self.profiler.info['qualidade'] = self.quality.name
+        if self.telemetry:
+            self.telemetry.emit('quality', level=self.quality.name, changes=self.quality.changes,
+                                budget_ms=round(self.quality.budget_ms, 2))
+
+    def mark_startup(self, name):
+        self.startup_marks.append((name, time.perf_counter()))
+
+    def report_startup(self):
+        """Imprime o tempo de cada etapa até o primeiro frame (desde o início do processo)."""
+        print("Inicialização (ms):")
+        previous = STARTUP_T0
+        for name, moment in self.startup_marks:
+            print(f"  {name:<16} {(moment - previous) * 1000:>8.1f}")
+            previous = moment
+        print(f"  {'total':<16} {(previous - STARTUP_T0) * 1000:>8.1f}")
 
     def new_game(self):
-        """Reseta tudo para um novo jogo."""
-        self.score = 0
-        self.game_speed = 4 # Velocidade inicial dos objetos
-        self.shake_duration = 0
-        
-        # Limpa todos os grupos
-        self.all_sprites = pygame.sprite.Group()
-        self.tunnel_objects = pygame.sprite.Group() # Obstáculos e itens
-        self.background_elements = pygame.sprite.Group() # Estrelas e objetos de Alice
-        self.particles = pygame.sprite.Group() # Efeitos de partículas
-
-        # Cria o jogador
-        self.player = Player()
-        self.all_sprites.add(self.player)
-        
-        # Cria elementos de fundo
-        for _ in range(100): # Mais elementos para um túnel denso
-            bg_elem = BackgroundElement()
-            self.all_sprites.add(bg_elem)
-            self.background_elements.add(bg_elem)
-            
-        # Inicia o timer de spawn de objetos
-        pygame.time.set_timer(self.SPAWN_OBJECT_EVENT, 1200) # Primeiro spawn em 1.2 seg
+        """Reseta tudo para um novo jogo (sem alocar sprites nem superfícies)."""
+        self.sim_accumulator = 0.0
+        for session in self.sessions:
+            session.new_game()
         
+        # Elementos de fundo
+        self.starfield.reset()
+
         self.game_state = 'PLAYING'
 
     def run(self):
-        """Loop principal que gerencia os estados do jogo."""
+        """Máquina de estados: cada estado tem uma entrada (uma vez) e um frame.
+
+        Só o PLAYING roda a todo FPS; as telas paradas bloqueiam em
+        pygame.event.wait até o próximo evento ou frame de animação."""
+        enter = {'START': self.enter_start_screen, 'PLAYING': self.enter_playing, 'GAME_OVER': self.enter_game_over}
+        frame = {'START': self.start_screen_frame, 'PLAYING': self.playing_frame, 'GAME_OVER': self.game_over_frame}
+        current = None
         while self.running:
-            self.clock.tick(FPS)
-            
-            if self.game_state == 'START':
-                self.show_start_screen()
-            elif self.game_state == 'PLAYING':
-                self.run_game_loop()
-            elif self.game_state == 'GAME_OVER':
-                self.show_game_over_screen()
+            if self.game_state != current:
+                current = self.game_state
+                enter[current]()
+                continue
+            frame[current]()
         
+        if self.profiler:
+            self.profiler.dump()
+        self.scores.close() # Espera as escritas pendentes do placar
+        if self.telemetry:
+            for session in self.sessions:
+                if session.playing:
+                    session.end_telemetry('quit')
+            self.telemetry.close()
         pygame.quit()
 
-    def run_game_loop(self):
-        """O loop do jogo em si (quando está jogando)."""
+    def wait_events(self, timeout=None):
+        """Dorme até chegar um evento (ou `timeout` ms) e devolve os eventos pendentes."""
+        if timeout is None:
+            event = pygame.event.wait()
+        else:
+            event = pygame.event.wait(max(1, int(timeout))) # 0 esperaria para sempre
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def enter_playing(self):
+        self.clock.tick() # Não conta o tempo parado no menu como tempo de jogo
+
+    def playing_frame(self):
+        self.clock.tick(self.fps)
+        self.run_game_loop()
+
+    def run_game_loop(self, elapsed=None):
+        """O loop do jogo em si (quando está jogando).
+
+        Roda quantos passos fixos de simulação couberem no tempo decorrido
+        (`elapsed` ms, por padrão o do clock) em cada sessão e desenha
+        interpolando entre os dois últimos passos. Eventos, teclado,
+        estrelas e a ida para a tela são feitos uma vez para todas."""
+        if elapsed is None:
+            elapsed = self.clock.get_time()
+            # Só o tempo real ajusta a qualidade (o benchmark passa `elapsed` fixo)
+            if self.quality.frame(elapsed, self.clock.get_rawtime()):
+                self.apply_quality()
+        if self.telemetry:
+            self.telemetry.frame(elapsed) # Duração real do frame, antes do limite
+            self.telemetry.tick()
+        elapsed = min(elapsed, MAX_FRAME_MS)
+        if self.replay:
+            elapsed *= self.replay_speed
+
+        prof = self.profiler
+        if prof:
+            prof.start_frame()
+
         # --- Eventos ---
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
                 
-            if event.type == self.SPAWN_OBJECT_EVENT:
-
-                fase = self.get_current_phase()
-
-                # ===============================
-                # CONFIGURAÇÃO POR FASE
-                # ===============================
-
-                if fase == 1:
-                    spawn_interval = random.randint(800, 1000)
-                    chance_obstaculo = 0.60
-                    chance_shrink = 0.30
-                    chance_grow = 0.10
-
-                elif fase == 2:
-                    spawn_interval = random.randint(450, 700)
-                    chance_obstaculo = 0.75
-                    chance_shrink = 0.20
-                    chance_grow = 0.05
-
-                else:  # FASE 3
-                    spawn_interval = random.randint(200, 450)
-                    chance_obstaculo = 0.90
-                    chance_shrink = 0.08
-                    chance_grow = 0.02
-
-                # NORMALIZA
-                total = chance_obstaculo + chance_shrink + chance_grow
-                chance_obstaculo /= total
-                chance_shrink /= total
-                chance_grow /= total
-
-                # ===============================
-                # SORTEIA O OBJETO
-                # ===============================
-                r = random.random()
-
-                if r < chance_obstaculo:
-                    obj_type = 'danger'
-                elif r < chance_obstaculo + chance_shrink:
-                    obj_type = 'shrink'
-                else:
-                    obj_type = 'grow'
-
-                # CRIA
-                new_obj = TunnelObject(obj_type, self.game_speed)
-                self.all_sprites.add(new_obj)
-                self.tunnel_objects.add(new_obj)
-
-                # REAGENDA
-                pygame.time.set_timer(self.SPAWN_OBJECT_EVENT, spawn_interval)
-
-            
             if event.type == self.SCREEN_SHAKE_EVENT:
-                self.shake_duration = 0 # Encerra o shake
+                self.sessions[event.session].shake_duration = 0 # Encerra o shake
+
+            if event.type == pygame.KEYDOWN and prof:
+                prof.handle_key(event.key)
+
+        # --- Passos de simulação que cabem no tempo decorrido ---
+        self.sim_accumulator += elapsed
+        steps = int(self.sim_accumulator // FRAME_MS)
+        self.sim_accumulator -= steps * FRAME_MS
+
+        # --- Entrada (teclado, ou do arquivo no replay) ---
+        keys = None if self.replay else pygame.key.get_pressed()
+        self._lap('events')
+
+        # --- Simulação: spawn, movimento, velocidade, score e colisões ---
+        for session in self.sessions:
+            if session.playing:
+                session.advance(steps, keys)
 
         # --- Atualização (Update) ---
-        self.all_sprites.update() # Atualiza todos os sprites
-        self.particles.update() # Atualiza apenas as partículas
-        
-        # Aumenta a velocidade do jogo gradualmente
-        self.game_speed += 0.001
-        
-        # Aumenta o score com base na velocidade do jogo e multiplicador
-        self.score += int(1 * self.player.score_multiplier * (self.game_speed / 4))
-            
-        # --- Verificação de Colisões ---
-        hits = pygame.sprite.spritecollide(self.player, self.tunnel_objects, False)
-        for hit in hits:
-            if hit.obj_type == 'danger':
-                # Game Over!
-                self.particles.add(Particle(self.player.rect.center, RED, size=8, num_particles=30))
-                self.shake_screen(300) # Tremer a tela por 300ms
-                self.game_state = 'GAME_OVER'
-                self.save_high_score()
-            
-            elif hit.obj_type == 'shrink':
-                self.player.shrink()
-                self.particles.add(Particle(hit.rect.center, GREEN, min_speed=1, max_speed=4, size=6, num_particles=15))
-                hit.kill()
-            
-            elif hit.obj_type == 'grow':
-                self.player.grow()
-                self.particles.add(Particle(hit.rect.center, PURPLE, min_speed=1, max_speed=4, size=6, num_particles=15))
-                hit.kill()
+        alpha = self.sim_accumulator / FRAME_MS
+        frames = elapsed / FRAME_MS
+        for session in self.sessions:
+            session.update(alpha if session.playing else 1.0, frames) # Parada: sem interpolar
 
         # --- Desenho (Render) ---
-        self.screen.fill(self.get_background_color())
-        
-        # Desenha em camadas: fundo, objetos, jogador, partículas
-        self.background_elements.draw(self.screen)
-        self.tunnel_objects.draw(self.screen)
-        self.all_sprites.draw(self.screen) # O player está aqui
-        for p in self.particles:
-            p.draw(self.screen) # Desenha partículas por cima
-        
-        # Desenha HUD
-        self.draw_text(f"Score: {self.score}", self.font_small, WHITE, SCREEN_WIDTH / 2, 10)
-        self.draw_text(f"High Score: {self.high_score}", self.font_tiny, LIGHT_GRAY, SCREEN_WIDTH / 2, 40)
-        self.draw_text(f"Fase: {self.get_current_phase()}", self.font_small, YELLOW, SCREEN_WIDTH / 2, 90)
-
-        if self.player.effect:
-            powerup_text = f"Efeito: {self.player.effect.upper()} ({int((self.player.effect_duration - (pygame.time.get_ticks() - self.player.effect_timer)) / 1000) + 1}s)"
-            color = PLAYER_COLOR_GROW if self.player.effect == 'grow' else PLAYER_COLOR_SHRINK
-            self.draw_text(powerup_text, self.font_tiny, color, SCREEN_WIDTH / 2, 65)
-
-        # Aplica o shake na tela
-        offset_x, offset_y = 0, 0
-        if self.shake_duration > 0:
-            offset_x = random.randint(-5, 5)
-            offset_y = random.randint(-5, 5)
-            self.shake_duration -= self.clock.get_time()
-        
-        final_surface = self.screen.copy() # Copia o que foi desenhado
-        self.screen.fill(BLACK) # Limpa a tela real
-        self.screen.blit(final_surface, (offset_x, offset_y)) # Desenha com offset
-
+        # Fundo de todas as sessões numa passada: a cor de cada faixa e as mesmas estrelas por cima.
+        # Um único destino para as camadas RLE (alternar destinos faz o SDL recodificá-las a cada blit)
+        for session in self.sessions:
+            self.canvas.fill(self.get_background_color(session.score), session.viewport)
+        self.starfield.update(frames)
+        self.starfield.draw(self.canvas)
+        self._lap('background')
+
+        for session in self.sessions:
+            session.draw()
+
+        if self.quality.level: # Qualidade reduzida: avisa no canto da primeira sessão
+            self.draw_text(f"Qualidade: {self.quality.name}", self.font_tiny, DIM_GRAY, 80, SCREEN_HEIGHT - 30,
+                           self.sessions[0].canvas)
+            self._lap('hud')
+
+        if prof:
+            prof.draw(self.sessions[0].canvas, self.font_tiny)
+            prof.lap('profiler_overlay')
+
+        self.present()
+        if prof:
+            prof.end_frame()
+
+        if not any(session.playing for session in self.sessions):
+            self.game_state = 'GAME_OVER'
+
+    def present(self):
+        """Leva o canvas para a tela, faixa por faixa numa única chamada de blits (com offset no shake)."""
+        blits = []
+        shake = self.quality.settings['shake']
+        for session in self.sessions:
+            viewport = session.viewport
+            if session.shake_duration > 0 and shake:
+                offset_x = random.randint(-5, 5)
+                offset_y = random.randint(-5, 5)
+                session.shake_duration -= self.clock.get_time()
+
+                # Recorta a faixa para o offset não invadir a sessão vizinha
+                self.screen.fill(BLACK, viewport)
+                area = pygame.Rect(viewport.x + max(0, -offset_x), max(0, -offset_y),
+                                   SCREEN_WIDTH - abs(offset_x), SCREEN_HEIGHT - abs(offset_y))
+                blits.append((self.canvas, (viewport.x + max(0, offset_x), max(0, offset_y)), area))
+            else:
+                blits.append((self.canvas, viewport.topleft, viewport))
+        self.screen.blits(blits, doreturn=False)
+        self._lap('present')
         pygame.display.flip()
+        self._lap('flip')
+
+    def flush_telemetry(self):
+        """Telas paradas não chamam tick(): o lote pendente (ex.: a morte e o fim da partida) sai já."""
+        if self.telemetry:
+            self.telemetry.flush()
+
+    def _lap(self, name):
+        if self.profiler:
+            self.profiler.lap(name)
+
+    def enter_start_screen(self):
+        """Prepara a tela de início: estrelas e os textos fixos (renderizados uma vez)."""
+        self.flush_telemetry()
+        self.starfield.reset()
+        center = self.screen.get_width() / 2
+        self.start_texts = [
+            self.text_blit(GAME_TITLE, self.font_main, WHITE, center, SCREEN_HEIGHT / 4),
+            self.text_blit("Caindo na Toca do Coelho", self.font_small, PLAYER_COLOR_NORMAL, center, SCREEN_HEIGHT / 4 + 60),
+            self.text_blit("Desvie dos obstáculos", self.font_small, WHITE, center, SCREEN_HEIGHT / 2 - 30),
+            self.text_blit("Pegue a poção para encolher e fuja das pizzas", self.font_tiny, WHITE, center, SCREEN_HEIGHT / 2 + 10),
+        ]
+        if len(self.sessions) == 1:
+            self.start_texts.append(self.text_blit("Use as Setas <- e -> para mover a Alice", self.font_small, WHITE, center, SCREEN_HEIGHT * 0.7))
+        else:
+            for session in self.sessions: # Teclas de cada jogador, na sua faixa da tela
+                left, right = (pygame.key.name(key).upper() for key in session.controls)
+                self.start_texts.append(self.text_blit(f"Jogador {session.index + 1}: {left} e {right}", self.font_small, WHITE,
+                                                       session.viewport.centerx, SCREEN_HEIGHT * 0.7))
+        self.start_texts = [self.opaque_text(text) for text in self.start_texts]
+        self.start_prompt = self.opaque_text(self.text_blit("Pressione qualquer tecla para começar", self.font_small, YELLOW,
+                                                            center, SCREEN_HEIGHT * 0.85))
+        self.screen.fill(BLACK) # Depois só as estrelas e os textos mudam (ver Starfield.redraw)
+        self.idle_frame_at = pygame.time.get_ticks()
+        self.draw_start_screen(0)
+
+        if self.measure_startup: # Primeiro frame na tela: mede e sai
+            self.mark_startup('primeiro frame')
+            self.report_startup()
+            self.running = False
+
+    def start_screen_frame(self):
+        """Espera uma tecla; acorda só para animar as estrelas a IDLE_FPS."""
+        for event in self.wait_events(self.idle_frame_at - pygame.time.get_ticks()):
+            if event.type == pygame.QUIT:
+                self.running = False
+                return
+            if event.type == pygame.KEYUP:
+                self.new_game() # Começa o jogo
+                return
+
+        now = pygame.time.get_ticks()
+        if now >= self.idle_frame_at:
+            frame_ms = 1000 / IDLE_FPS
+            self.draw_start_screen(frame_ms / FRAME_MS)
+            self.idle_frame_at = max(self.idle_frame_at + frame_ms, now)
+
+    def draw_start_screen(self, frames):
+        """Estrelas, textos fixos e o texto piscando, sem repintar a tela inteira.
+
+        As camadas de estrelas do fundo são apagadas e redesenhadas pixel a
+        pixel (blits RLE) e os textos são opacos: o frame parado custa poucos
+        blits pequenos em vez de um fill e cópias da tela toda."""
+        self.starfield.update(frames)
+        self.starfield.redraw(self.screen, slice(IDLE_STAR_LAYERS))
+        self.screen.blits(self.start_texts, doreturn=False)
         
-
-    def show_start_screen(self):
-        """Mostra a tela de início."""
-        # Animação básica na tela de início (estrelas de fundo)
-        start_elements = pygame.sprite.Group()
-        for _ in range(70):
-            start_elements.add(BackgroundElement())
-            
-        waiting = True
-        while waiting:
-            self.clock.tick(FPS)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    waiting = False
-                if event.type == pygame.KEYUP:
-                    waiting = False
-            
-            start_elements.update()
-            
-            self.screen.fill(BLACK)
-            start_elements.draw(self.screen)
-            
-            self.draw_text(GAME_TITLE, self.font_main, WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 4)
-            self.draw_text("Caindo na Toca do Coelho", self.font_small, PLAYER_COLOR_NORMAL, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 4 + 60)
-            self.draw_text("Desvie dos obstáculos", self.font_small, WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 30)
-            self.draw_text("Pegue a poção para encolher e fuja das pizzas", self.font_tiny, WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 10)
-            self.draw_text("Use as Setas <- e -> para mover a Alice", self.font_small, WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT * 0.7)
-            
-            # Efeito de piscar no texto
-            if int(pygame.time.get_ticks() / 500) % 2 == 0:
-                self.draw_text("Pressione qualquer tecla para começar", self.font_small, YELLOW, SCREEN_WIDTH / 2, SCREEN_HEIGHT * 0.85)
-            
-            pygame.display.flip()
+        # Efeito de piscar no texto
+        prompt, rect = self.start_prompt
+        if pygame.time.get_ticks() // BLINK_MS % 2 == 0:
+            self.screen.blit(prompt, rect)
+        else:
+            self.screen.fill(BLACK, rect)
         
-        self.new_game() # Começa o jogo
+        pygame.display.flip()
 
-    def show_game_over_screen(self):
-        """Mostra a tela de Game Over."""
+    def enter_game_over(self):
+        """Desenha a tela de Game Over uma única vez (ela não tem animação)."""
+        self.flush_telemetry()
+        center = self.screen.get_width() / 2
         self.screen.fill(BLACK)
-        self.draw_text("GAME OVER", self.font_main, RED, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 4)
+        self.draw_text("GAME OVER", self.font_main, RED, center, SCREEN_HEIGHT / 4)
         
-        if self.score > self.high_score: # Mensagem de novo recorde
-             self.draw_text("NOVO RECORDE!", self.font_small, GREEN, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 40)
-             self.draw_text(f"Score Final: {self.score}", self.font_small, WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
-        else:
-            self.draw_text(f"Score Final: {self.score}", self.font_small, WHITE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
-            self.draw_text(f"Seu Melhor: {self.high_score}", self.font_tiny, LIGHT_GRAY, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 30)
+        # Resultado de cada jogador, na sua faixa da tela
+        for session in self.sessions:
+            x = session.viewport.centerx
+            if len(self.sessions) > 1:
+                self.draw_text(f"Jogador {session.index + 1}", self.font_small, LIGHT_GRAY, x, SCREEN_HEIGHT / 2 - 80)
+            if session.new_record: # Mensagem de novo recorde
+                 self.draw_text("NOVO RECORDE!", self.font_small, GREEN, x, SCREEN_HEIGHT / 2 - 40)
+                 self.draw_text(f"Score Final: {session.score}", self.font_small, WHITE, x, SCREEN_HEIGHT / 2)
+            else:
+                self.draw_text(f"Score Final: {session.score}", self.font_small, WHITE, x, SCREEN_HEIGHT / 2)
+                self.draw_text(f"Seu Melhor: {self.high_score}", self.font_tiny, LIGHT_GRAY, x, SCREEN_HEIGHT / 2 + 30)
+
+        # Placar
+        for i, entry in enumerate(self.scores.entries[:LEADERBOARD_SHOWN]):
+            line = f"{i + 1}. {entry['score']}  (fase {entry['phase']})"
+            self.draw_text(line, self.font_tiny, LIGHT_GRAY, center, SCREEN_HEIGHT / 2 + 80 + i * 22)
             
-        self.draw_text("Pressione 'R' para reiniciar  |  'M' para menu", self.font_small, YELLOW, SCREEN_WIDTH / 2, SCREEN_HEIGHT * 0.8)
+        self.draw_text("Pressione 'R' para reiniciar  |  'M' para menu", self.font_small, YELLOW, center, SCREEN_HEIGHT * 0.8)
         pygame.display.flip()
-        
-        # Espera o jogador pressionar 'R'
-        waiting = True
-        while waiting:
-            self.clock.tick(FPS)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    waiting = False
-                if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_r:
-                        waiting = False
-                        self.new_game()
-                    if event.key == pygame.K_m:
-                        waiting = False
-                        self.game_state = 'START'
+
+    def game_over_frame(self):
+        """Dorme até o jogador pressionar 'R' ou 'M'."""
+        for event in self.wait_events():
+            if event.type == pygame.QUIT:
+                self.running = False
+                return
+            if event.type == pygame.VIDEOEXPOSE: # Janela voltou a aparecer: redesenha
+                self.enter_game_over()
+            if event.type == pygame.KEYUP:
+                if event.key == pygame.K_r:
+                    self.new_game()
+                    return
+                if event.key == pygame.K_m:
+                    self.game_state = 'START'
+                    return
 
     def lerp_color(self, color1, color2, t):
         """Interpolação linear de cor (t = 0 → cor1, t = 1 → cor2)."""
@@ -528,37 +1493,88 @@ class Game:
             int(color1[2] + (color2[2] - color1[2]) * t)
         )
 
-    def get_background_color(self):
-        """Retorna a cor de fundo conforme a fase."""
-        s = self.score
-
+    def phase_color(self, s):
+        """Cor de fundo para o score `s` (usada para montar a paleta)."""
         # ----- FASE 1 -----
-        if s < 2500:
-            t = s / 2500
+        if s < PHASE_2_SCORE:
+            t = s / PHASE_2_SCORE
             return self.lerp_color(FASE_1_COLOR, FASE_1_COLOR_END, t)
 
         # ----- FASE 2 -----
-        if s < 8000:
-            t = (s - 2500) / (8000 - 2500)
+        if s < PHASE_3_SCORE:
+            t = (s - PHASE_2_SCORE) / (PHASE_3_SCORE - PHASE_2_SCORE)
             return self.lerp_color(FASE_2_COLOR, FASE_2_COLOR_END, t)
 
         # ----- FASE 3 -----
-        t = min((s - 8000) / 3000, 1)
+        t = min((s - PHASE_3_SCORE) / PHASE_3_FADE, 1)
         return self.lerp_color(FASE_3_COLOR, FASE_3_COLOR_END, t)
 
-    def draw_text(self, text, font, color, x, y):
-        """Função helper para desenhar texto na tela."""
-        text_surface = font.render(text, True, color)
+    def get_background_color(self, score):
+        """Retorna a cor de fundo conforme a fase (consulta à paleta)."""
+        palette = self.background_palette
+        i = min(score, len(palette) - 1)
+        color = palette[i]
+        if color is None:
+            color = palette[i] = self.phase_color(i)
+        return color
+
+    def draw_text(self, text, font, color, x, y, surface=None):
+        """Função helper para desenhar texto na tela (ou em `surface`). Retorna o rect ocupado."""
+        text_surface = self.text.render(font, text, color)
         text_rect = text_surface.get_rect()
         text_rect.midtop = (x, y)
-        self.screen.blit(text_surface, text_rect)
-
-    def shake_screen(self, duration):
-        """Ativa o efeito de tremor na tela."""
-        self.shake_duration = duration
-        pygame.time.set_timer(self.SCREEN_SHAKE_EVENT, duration, 1) # Dispara uma vez
+        if surface is None:
+            surface = self.screen
+        surface.blit(text_surface, text_rect)
+        return text_rect
+
+    def text_blit(self, text, font, color, x, y):
+        """Texto renderizado e o rect onde ele fica (para desenhar depois com blits)."""
+        text_surface = self.text.render(font, text, color)
+        return text_surface, text_surface.get_rect(midtop=(x, y))
+
+    def opaque_text(self, text, background=BLACK):
+        """(superfície, rect) de text_blit com o fundo já pintado: redesenhar não acumula o antialias."""
+        surface, rect = text
+        opaque = pygame.Surface(rect.size).convert()
+        opaque.fill(background)
+        opaque.blit(surface, (0, 0))
+        return opaque, rect
 
 # --- Bloco de Inicialização ---
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=GAME_TITLE)
+    parser.add_argument('--profile', nargs='?', const='frame_trace.json', metavar='ARQUIVO',
+                        help="mede cada fase do frame (overlay com F3, cProfile com F10) e "
+                             "grava o trace em ARQUIVO (.json ou .csv) ao sair")
+    parser.add_argument('--fps', type=int, default=FPS,
+                        help="limite de FPS do render, ex.: 120 ou 144 (0 = sem limite); "
+                             "a simulação roda sempre em passos fixos de 60 por segundo")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="mede o tempo até o primeiro frame, mostra cada etapa e sai")
+    parser.add_argument('--replay', metavar='ARQUIVO', help="reproduz uma partida gravada")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="velocidade do replay (2 = dobro, 0.5 = câmera lenta)")
+    parser.add_argument('--no-record', action='store_true', help=f"não grava as partidas em {REPLAY_DIR}/")
+    parser.add_argument('--no-telemetry', action='store_true', help=f"não grava telemetria em {TELEMETRY_DIR}/")
+    parser.add_argument('--players', type=int, default=1, choices=range(1, len(PLAYER_CONTROLS) + 1),
+                        help="jogadores em split-screen (teclas: setas, A/D, J/L, 4/6 do teclado numérico)")
+    parser.add_argument('--quality', default='auto', choices=('auto',) + QUALITY_NAMES,
+                        help="nível de qualidade gráfica; 'auto' ajusta pelo tempo medido dos frames")
+    parser.add_argument('--frame-budget', type=float, metavar='MS',
+                        help="tempo de frame alvo da qualidade automática (padrão: 1000/FPS)")
+    args = parser.parse_args(argv)
+    if args.replay and args.players > 1:
+        parser.error("--replay reproduz uma partida de um jogador só")
+    return args
+
 if __name__ == "__main__":
-    game = Game()
+    args = parse_args()
+    game = Game(profiler=FrameProfiler(args.profile) if args.profile else None,
+                replay=Replay.load(args.replay) if args.replay else None,
+                replay_speed=args.speed, record=not args.no_record, fps=args.fps,
+                measure_startup=args.measure_startup, players=args.players,
+                telemetry=None if args.no_telemetry or args.replay else Telemetry(), # Replays não entram nas estatísticas
+                quality=None if args.quality == 'auto' else QUALITY_NAMES.index(args.quality),
+                frame_budget=args.frame_budget)
     game.run()
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""Qualidade adaptativa: troca custo visual por frames no tempo.
+
+O Game passa a cada frame o tempo medido pelo clock (`clock.get_time()`,
+com a espera do limite de FPS) e o tempo de trabalho (`clock.get_rawtime()`,
+sem a espera). Numa janela de QUALITY_WINDOW frames:
+
+- média de get_time acima de QUALITY_DEGRADE x orçamento: frames atrasando,
+  cai um nível;
+- média de get_rawtime abaixo de QUALITY_RESTORE x orçamento: sobra folga,
+  sobe um nível (só depois de QUALITY_HOLD_WINDOWS janelas desde a última
+  queda, para não ficar oscilando entre dois níveis).
+
+Só decide o nível; quem aplica as configurações (estrelas, partículas,
+shake) é o Game. Não depende do pygame.
+"""
+from collections import deque
+
+# Níveis, do mais bonito para o mais barato
+QUALITY_LEVELS = (
+    # star_layers: camadas de estrelas desenhadas (das da frente para as do fundo)
+    # particle_scale/max_particles: fração de cada explosão e limite de partículas vivas por sessão
+    # shake: tremor da tela (fill da faixa + blit com offset)
+    {'name': 'alta', 'star_layers': 4, 'particle_scale': 1.0, 'max_particles': None, 'shake': True},
+    {'name': 'media', 'star_layers': 3, 'particle_scale': 0.5, 'max_particles': 600, 'shake': True},
+    {'name': 'baixa', 'star_layers': 2, 'particle_scale': 0.25, 'max_particles': 200, 'shake': False},
+    {'name': 'minima', 'star_layers': 1, 'particle_scale': 0.1, 'max_particles': 60, 'shake': False},
+)
+QUALITY_NAMES = tuple(level['name'] for level in QUALITY_LEVELS)
+
+QUALITY_WINDOW = 60        # Frames por decisão (1 s a 60 FPS)
+QUALITY_DEGRADE = 1.15     # Média de get_time acima disto x orçamento: cai um nível
+QUALITY_RESTORE = 0.6      # Média de get_rawtime abaixo disto x orçamento: sobe um nível
+QUALITY_HOLD_WINDOWS = 5   # Janelas sem subir depois de uma queda
+
+
+class QualityController:
+    """Nível de qualidade escolhido pelo tempo dos últimos frames.
+
+    `level` fixo (índice em QUALITY_LEVELS) desliga o ajuste automático."""
+    def __init__(self, budget_ms, level=None, window=QUALITY_WINDOW):
+        self.budget_ms = budget_ms
+        self.auto = level is None
+        self.level = level or 0
+        self.window = window
+        self.frame_times = deque(maxlen=window)
+        self.work_times = deque(maxlen=window)
+        self.hold = 0     # Janelas que ainda faltam para poder subir
+        self.changes = 0  # Trocas de nível desde o início
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    @property
+    def name(self):
+        return QUALITY_NAMES[self.level]
+
+    def frame(self, frame_ms, work_ms):
+        """Registra um frame. Retorna True se o nível mudou (o Game reaplica as configurações)."""
+        if not self.auto:
+            return False
+        self.frame_times.append(frame_ms)
+        self.work_times.append(work_ms)
+        if len(self.frame_times) < self.window:
+            return False
+
+        frame_avg = sum(self.frame_times) / self.window
+        work_avg = sum(self.work_times) / self.window
+        self.frame_times.clear()
+        self.work_times.clear()
+        if frame_avg > self.budget_ms * QUALITY_DEGRADE and self.level < len(QUALITY_LEVELS) - 1:
+            self.hold = QUALITY_HOLD_WINDOWS
+            return self._set(self.level + 1)
+        if self.hold:
+            self.hold -= 1
+            return False
+        if work_avg < self.budget_ms * QUALITY_RESTORE and self.level > 0:
+            return self._set(self.level - 1)
+        return False
+
+    def _set(self, level):
+        self.level = level
+        self.changes += 1
+        return True
@@ -0,0 +1,184 @@
+"""Placar persistente (top-N) gravado fora do loop de render.
+
+Dois arquivos:
+- LEADERBOARD_FILE: snapshot JSON com o top-N. É o único lido ao iniciar,
+  então a carga não depende de quantas partidas já foram jogadas. É sempre
+  reescrito por inteiro num arquivo temporário e trocado com os.replace,
+  então um crash no meio da escrita deixa o snapshot anterior intacto.
+- SCORE_LOG_FILE: log append-only (uma linha JSON por partida). Serve para
+  reconstruir o snapshot se ele sumir ou estiver corrompido. Quando passa de
+  LOG_COMPACT_ENTRIES linhas, é compactado para só as entradas do top-N.
+
+As escritas rodam numa thread em segundo plano; submit() só atualiza o
+placar em memória e enfileira o trabalho. save_file() usa a mesma thread
+para outros arquivos da partida (o replay), na ordem em que foram pedidos.
+"""
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from simulation import get_phase
+
+LEADERBOARD_FILE = "leaderboard.json"
+SCORE_LOG_FILE = "scores.log"
+LEGACY_HIGH_SCORE_FILE = "highscore.txt" # Formato antigo: um inteiro
+LEADERBOARD_SIZE = 10
+LOG_COMPACT_ENTRIES = 1000
+
+
+def _atomic_write(path, text):
+    """Escreve num temporário do mesmo diretório e troca de uma vez (os.replace)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_log(path):
+    """Entradas do log; ignora linhas corrompidas (ex.: a última, cortada por um crash)."""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                entries.append({'score': int(entry['score']), 'phase': entry.get('phase'),
+                                'time': entry.get('time'), 'replay': entry.get('replay')})
+            except (ValueError, KeyError, TypeError):
+                continue
+    return entries
+
+
+class ScoreStore:
+    """Top-N em memória + escrita assíncrona do log e do snapshot."""
+    def __init__(self, leaderboard_path=LEADERBOARD_FILE, log_path=SCORE_LOG_FILE,
+                 legacy_path=LEGACY_HIGH_SCORE_FILE, size=LEADERBOARD_SIZE,
+                 compact_after=LOG_COMPACT_ENTRIES):
+        self.leaderboard_path = leaderboard_path
+        self.log_path = log_path
+        self.size = size
+        self.compact_after = compact_after
+        self.entries = []      # Top-N, do maior score para o menor
+        self.log_entries = 0   # Linhas no log desde a última compactação
+        self.errors = 0
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name="score-writer", daemon=True)
+        self._thread.start()
+
+        if not self._load_snapshot():
+            self._recover(legacy_path)
+
+    # ---------- Carga ----------
+    def _load_snapshot(self):
+        try:
+            with open(self.leaderboard_path) as f:
+                data = json.load(f)
+            self.entries = [dict(entry, score=int(entry['score'])) for entry in data['entries']][:self.size]
+            self.log_entries = int(data.get('log_entries', 0))
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _recover(self, legacy_path):
+        """Sem snapshot válido: reconstrói a partir do log, ou importa o highscore.txt antigo."""
+        entries = []
+        if os.path.exists(self.log_path):
+            try:
+                entries = _read_log(self.log_path)
+            except OSError:
+                entries = []
+            self.log_entries = len(entries)
+        elif os.path.exists(legacy_path):
+            try:
+                with open(legacy_path) as f:
+                    score = int(f.read())
+                entries = [{'score': score, 'phase': get_phase(score), 'time': None, 'replay': None}]
+            except (OSError, ValueError):
+                entries = []
+        else:
+            return # Primeira execução: placar vazio
+
+        self.entries = sorted(entries, key=lambda e: e['score'], reverse=True)[:self.size]
+        self._queue.put(('snapshot', None, self._snapshot()))
+
+    # ---------- Consulta ----------
+    def best(self):
+        return self.entries[0]['score'] if self.entries else 0
+
+    def rank(self, score):
+        """Posição (1 = melhor) que `score` teria no placar, ou None se não entra."""
+        for i, entry in enumerate(self.entries):
+            if score > entry['score']:
+                return i + 1
+        return len(self.entries) + 1 if len(self.entries) < self.size else None
+
+    # ---------- Escrita ----------
+    def submit(self, score, phase=None, replay=None):
+        """Registra uma partida. Não toca o disco: a thread de escrita cuida disso."""
+        entry = {
+            'score': score,
+            'phase': phase if phase is not None else get_phase(score),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'replay': replay,
+        }
+        rank = self.rank(score)
+        if rank is not None:
+            self.entries.insert(rank - 1, entry)
+            del self.entries[self.size:]
+
+        self.log_entries += 1
+        compact = self.log_entries > self.compact_after
+        if compact:
+            self.log_entries = len(self.entries)
+        self._queue.put(('compact' if compact else 'append', entry, self._snapshot()))
+        return rank
+
+    def save_file(self, path, data):
+        """Grava `data` (bytes) em `path` pela thread de escrita, criando a pasta se preciso."""
+        self._queue.put(('file', path, data))
+
+    def _snapshot(self):
+        return {'version': 1, 'log_entries': self.log_entries, 'entries': [dict(e) for e in self.entries]}
+
+    def close(self):
+        """Espera as escritas pendentes (chamar ao sair do jogo)."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            kind, entry, snapshot = job
+            if kind == 'file':
+                self._write_file(entry, snapshot)
+                continue
+            try:
+                if kind == 'append':
+                    with open(self.log_path, 'a') as f:
+                        f.write(json.dumps(entry) + '\n')
+                        f.flush()
+                        os.fsync(f.fileno())
+                elif kind == 'compact':
+                    # O log passa a ter só o top-N (a entrada nova já está no snapshot, se entrou)
+                    lines = ''.join(json.dumps(e) + '\n' for e in snapshot['entries'])
+                    _atomic_write(self.log_path, lines)
+                _atomic_write(self.leaderboard_path, json.dumps(snapshot, indent=1))
+            except OSError as e:
+                self.errors += 1
+                print(f"Aviso: não foi possível salvar o placar ({e})", file=sys.stderr)
+
+    def _write_file(self, path, data):
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        except OSError as e:
+            self.errors += 1
+            print(f"Aviso: não foi possível gravar {path} ({e})", file=sys.stderr)
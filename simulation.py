@@ -0,0 +1,709 @@
+"""Núcleo de simulação do jogo, sem pygame.
+
+Toda a regra do jogo (spawn, movimento, aceleração, score e colisões) vive
+aqui como um passo puro `step(state, inp)` de FRAME_MS fixo (o render
+interpola entre passos). O relógio é o próprio `state.time_ms` e toda a aleatoriedade vem da fila de
+spawns `state.spawns`, sorteada a partir da seed, então uma partida é
+reproduzível e roda sem tela, tão rápido quanto a CPU permitir.
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import struct
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# --- Regras do Jogo ---
+SCREEN_WIDTH = 600
+SCREEN_HEIGHT = 800
+FPS = 60
+FRAME_MS = 1000 / FPS # Um passo de simulação equivale a um frame a 60 FPS
+
+# Posição Y da Alice (primeiro quarto/terço da tela)
+PLAYER_START_Y = SCREEN_HEIGHT * 0.25
+PLAYER_SPEED = 7 # Pixels por frame
+PLAYER_ASSET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "alice.png") # Independe do diretório atual
+
+# Altura da Alice para cada efeito (a largura segue a proporção do PNG)
+PLAYER_HEIGHTS = {None: 50, 'shrink': 30, 'grow': 80}
+SCORE_MULTIPLIERS = {None: 1, 'shrink': 1, 'grow': 2}
+EFFECT_DURATION = 5000 # ms
+
+INITIAL_GAME_SPEED = 4 # Velocidade inicial dos objetos
+GAME_SPEED_RAMP = 0.001 # Aumento de velocidade por frame
+FIRST_SPAWN_MS = 1200 # Primeiro spawn em 1.2 seg
+
+# Pontuação em que começam as fases 2 e 3
+PHASE_2_SCORE = 2500
+PHASE_3_SCORE = 8000
+
+# Configuração por fase: intervalo de spawn (ms) e chances de cada objeto
+PHASES = {
+    1: {'spawn_interval': (800, 1000), 'danger': 0.60, 'shrink': 0.30, 'grow': 0.10},
+    2: {'spawn_interval': (450, 700), 'danger': 0.75, 'shrink': 0.20, 'grow': 0.05},
+    3: {'spawn_interval': (200, 450), 'danger': 0.90, 'shrink': 0.08, 'grow': 0.02},
+}
+
+# Tamanho dos objetos: (largura mín, máx), (altura mín, máx)
+OBJECT_SIZES = {
+    'danger': ((40, 100), (15, 30)),
+    'shrink': ((28, 28), (28, 28)), # Poção "Beba-me" (diminui Alice)
+    'grow': ((32, 32), (32, 32)),   # Bolo "Coma-me" (aumenta Alice)
+}
+SIZE_QUANTUM = 5 # Tamanhos aleatórios são arredondados para múltiplos disto
+
+# Bits de entrada (um inteiro por passo)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+
+
+def get_phase(score):
+    """Fase atual (1, 2 ou 3) para um score."""
+    if score < PHASE_2_SCORE:
+        return 1
+    elif score < PHASE_3_SCORE:
+        return 2
+    else:
+        return 3
+
+
+def quantize(value, quantum=SIZE_QUANTUM):
+    """Arredonda um tamanho para o múltiplo de `quantum` mais próximo."""
+    return max(quantum, int(round(value / quantum)) * quantum)
+
+
+def _png_size(path):
+    """Lê largura e altura direto do cabeçalho IHDR do PNG (sem decodificar)."""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    return struct.unpack('>II', header[16:24])
+
+
+def _player_sizes():
+    width, height = _png_size(PLAYER_ASSET)
+    sizes = {}
+    for effect, target_height in PLAYER_HEIGHTS.items():
+        scale_factor = target_height / height # Mantém a proporção original
+        sizes[effect] = (int(width * scale_factor), int(height * scale_factor))
+    return sizes
+
+PLAYER_SIZES = _player_sizes()
+
+# Faixa vertical que a Alice pode ocupar (qualquer tamanho)
+PLAYER_BAND = (
+    int(PLAYER_START_Y) - max(h for _, h in PLAYER_SIZES.values()) // 2 - 1,
+    int(PLAYER_START_Y) + max(h for _, h in PLAYER_SIZES.values()) // 2 + 1,
+)
+
+# Fila de spawns: sorteada em lotes que cobrem alguns segundos de jogo
+SPAWN_LOOKAHEAD_MS = 3000
+SPAWN_Y_OFFSET = (20, 150) # Distância abaixo da tela em que os objetos nascem
+SPAWN_TYPES = ('danger', 'shrink', 'grow')
+
+# Justiça: toda "parede" de obstáculos (sem espaço vertical para a Alice passar
+# entre eles) deixa um vão horizontal por onde a maior Alice cabe
+PASSABLE_GAP = max(w for w, _ in PLAYER_SIZES.values()) + 2 * SIZE_QUANTUM
+WALL_CLEARANCE = max(h for _, h in PLAYER_SIZES.values())
+
+
+# --- Estado da Simulação ---
+class SimPlayer:
+    """Alice: posição (rect inteiro, como no pygame) e efeito ativo."""
+    __slots__ = ('effect', 'effect_timer', 'score_multiplier', 'width', 'height', 'x', 'y')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.effect = None
+        self.effect_timer = 0
+        self.score_multiplier = 1
+        self.width, self.height = PLAYER_SIZES[None]
+        self.x = SCREEN_WIDTH // 2 - self.width // 2
+        self.y = int(PLAYER_START_Y) - self.height // 2
+
+    @property
+    def rect(self):
+        return (self.x, self.y, self.width, self.height)
+
+    def set_effect(self, effect, now):
+        self.effect = effect
+        self.effect_timer = now if effect else 0
+        self.score_multiplier = SCORE_MULTIPLIERS[effect]
+        self._resize()
+
+    def _resize(self):
+        """Troca o tamanho conforme o efeito, mantendo o centro."""
+        width, height = PLAYER_SIZES[self.effect]
+        if (width, height) != (self.width, self.height):
+            center_x = self.x + self.width // 2
+            center_y = self.y + self.height // 2
+            self.width, self.height = width, height
+            self.x = center_x - width // 2
+            self.y = center_y - height // 2
+
+
+class SimObject:
+    """Obstáculo ou item subindo pelo túnel (registro leve, reciclado pelo SimState)."""
+    __slots__ = ('id', 'obj_type', 'x', 'y', 'width', 'height', 'speed')
+
+    def __init__(self, obj_id, obj_type, x, y, width, height, speed):
+        self.reset(obj_id, obj_type, x, y, width, height, speed)
+
+    def reset(self, obj_id, obj_type, x, y, width, height, speed):
+        self.id = obj_id # Ordem de spawn
+        self.obj_type = obj_type
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.speed = speed
+
+    @property
+    def rect(self):
+        return (self.x, self.y, self.width, self.height)
+
+
+class SweepAndPrune:
+    """Broadphase das colisões por varredura no eixo Y (sweep and prune).
+
+    A Alice ocupa sempre a mesma faixa vertical e cada objeto sobe com
+    velocidade constante, então o instante (em frames) em que ele entra e
+    sai dessa faixa é calculado uma única vez, na inserção. A cada passo só
+    os objetos dentro da faixa viram candidatos a colisão.
+    """
+    MARGIN = 1 # Frames de folga na entrada/saída (arredondamentos)
+
+    def __init__(self, top, bottom):
+        self.top = top
+        self.bottom = bottom
+        self._pending = [] # heap: (frame de entrada, id, frame de saída, objeto)
+        self._active = {}  # id -> (frame de saída, objeto)
+
+    def insert(self, obj, now):
+        speed = max(obj.speed, 1e-9)
+        enter = now + (obj.y - self.bottom) / speed - self.MARGIN
+        leave = now + (obj.y + obj.height - self.top) / speed + self.MARGIN
+        heapq.heappush(self._pending, (enter, obj.id, leave, obj))
+
+    def remove(self, obj):
+        self._active.pop(obj.id, None)
+
+    def clear(self):
+        self._pending.clear()
+        self._active.clear()
+
+    def candidates(self, now):
+        """Objetos que podem estar na faixa da Alice em `now`, em ordem de spawn."""
+        pending = self._pending
+        active = self._active
+        while pending and pending[0][0] <= now:
+            _, obj_id, leave, obj = heapq.heappop(pending)
+            if obj.id == obj_id: # Ignora entradas de objetos já reciclados
+                active[obj_id] = (leave, obj)
+
+        expired = [obj_id for obj_id, (leave, _) in active.items() if leave < now]
+        for obj_id in expired:
+            del active[obj_id]
+        return [active[obj_id][1] for obj_id in sorted(active)]
+
+
+class SpawnSchedule:
+    """Fila dos próximos spawns: tuplas (tempo_ms, tipo, x, y, largura, altura).
+
+    Cada lote cobre SPAWN_LOOKAHEAD_MS de jogo e é sorteado de uma vez com
+    NumPy a partir da tabela da fase atual; o passo só consome a fila pelo
+    tempo de simulação. Se a fase muda, os spawns ainda não consumidos são
+    sorteados de novo com a tabela nova (o horário do próximo é mantido).
+
+    Obstáculos que fechariam a passagem (uma parede sem vão de PASSABLE_GAP
+    px) são descartados ao gerar o lote. A posição vertical de cada
+    obstáculo é estimada com a velocidade do jogo no momento do sorteio.
+    """
+    def __init__(self, seed=None):
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.queue = deque()
+        self.next_ms = FIRST_SPAWN_MS # Horário do primeiro spawn ainda não sorteado
+        self.phase = None
+        self.phase_end = 0 # Score em que a fase muda (o score nunca diminui)
+        self.walls = deque() # Obstáculos recentes: [tempo, topo, altura, x, largura, grupo]
+
+    def _update(self, state):
+        """Re-sorteia na troca de fase e mantém pelo menos meio lote à frente."""
+        if state.score >= self.phase_end:
+            self.phase = phase = state.phase
+            self.phase_end = PHASE_2_SCORE if phase == 1 else PHASE_3_SCORE if phase == 2 else float('inf')
+            if self.queue:
+                self.next_ms = self.queue[0][0]
+                self.queue.clear()
+            while self.walls and self.walls[-1][0] >= self.next_ms:
+                self._forget(self.walls.pop())
+        if not self.queue or self.queue[-1][0] < state.time_ms + SPAWN_LOOKAHEAD_MS / 2:
+            self._generate(state.game_speed)
+
+    def due(self, state):
+        """Remove e retorna os spawns com horário até state.time_ms, em ordem."""
+        self._update(state)
+        queue = self.queue
+        if not queue or queue[0][0] > state.time_ms:
+            return ()
+        spawns = []
+        while queue and queue[0][0] <= state.time_ms:
+            spawns.append(queue.popleft())
+        return spawns
+
+    def pop_next(self, state):
+        """O próximo spawn da fila, seja qual for o horário."""
+        self._update(state)
+        return self.queue.popleft()
+
+    def _generate(self, speed):
+        config = PHASES[self.phase]
+        low, high = config['spawn_interval']
+        count = int(SPAWN_LOOKAHEAD_MS // low) + 1
+        rng = self.rng
+
+        intervals = rng.integers(low, high + 1, count)
+        times = self.next_ms + np.concatenate(([0], np.cumsum(intervals[:-1])))
+        self.next_ms += int(intervals.sum())
+
+        # Tipo: limiares acumulados das chances da fase (normalizadas)
+        total = config['danger'] + config['shrink'] + config['grow']
+        thresholds = [config['danger'] / total, (config['danger'] + config['shrink']) / total]
+        kinds = np.searchsorted(thresholds, rng.random(count), side='right')
+
+        # Tamanho e posição (tamanhos sorteados são quantizados, como no quantize)
+        limits = np.array([OBJECT_SIZES[t] for t in SPAWN_TYPES]).reshape(len(SPAWN_TYPES), 4)[kinds]
+        min_w, max_w, min_h, max_h = limits.T
+        widths = rng.integers(min_w, max_w + 1)
+        heights = rng.integers(min_h, max_h + 1)
+        widths = np.where(min_w != max_w, np.maximum(SIZE_QUANTUM, np.round(widths / SIZE_QUANTUM).astype(np.int64) * SIZE_QUANTUM), min_w)
+        heights = np.where(min_h != max_h, np.maximum(SIZE_QUANTUM, np.round(heights / SIZE_QUANTUM).astype(np.int64) * SIZE_QUANTUM), min_h)
+        xs = rng.integers(0, SCREEN_WIDTH - widths + 1)
+        ys = SCREEN_HEIGHT + rng.integers(SPAWN_Y_OFFSET[0], SPAWN_Y_OFFSET[1] + 1, count)
+
+        for t, kind, x, y, width, height in zip(times.tolist(), kinds.tolist(), xs.tolist(),
+                                                ys.tolist(), widths.tolist(), heights.tolist()):
+            obj_type = SPAWN_TYPES[kind]
+            if obj_type == 'danger' and not self._passable(t, y + speed * t / FRAME_MS, height, x, width):
+                continue
+            self.queue.append((t, obj_type, x, y, width, height))
+
+    def _passable(self, t, top, height, x, width):
+        """Registra o obstáculo se ele não fechar a passagem; senão retorna False.
+
+        Dois obstáculos fazem parte da mesma parede quando a Alice não cabe
+        entre eles (nem na vertical nem na horizontal). A passagem fecha
+        quando uma parede encosta nas duas bordas da tela."""
+        walls = self.walls
+        # Obstáculos muito acima já não formam parede com os novos
+        while walls and walls[0][1] + walls[0][2] + WALL_CLEARANCE + SPAWN_Y_OFFSET[1] < top:
+            self._forget(walls.popleft())
+
+        merged = []
+        low, high = x, x + width
+        for wall in walls:
+            _, other_top, other_height, other_x, other_width, group = wall
+            if (top - (other_top + other_height) < WALL_CLEARANCE and other_top - (top + height) < WALL_CLEARANCE
+                    and x - (other_x + other_width) < PASSABLE_GAP and other_x - (x + width) < PASSABLE_GAP
+                    and not any(group is g for g in merged)):
+                merged.append(group)
+                low, high = min(low, group[0]), max(high, group[1])
+        if low < PASSABLE_GAP and high > SCREEN_WIDTH - PASSABLE_GAP:
+            return False
+
+        # Junta as paredes tocadas num grupo só: [x mínimo, x máximo, obstáculos]
+        group = [low, high, []]
+        for old in merged:
+            for wall in old[2]:
+                wall[5] = group
+            group[2].extend(old[2])
+        wall = [t, top, height, x, width, group]
+        group[2].append(wall)
+        walls.append(wall)
+        return True
+
+    @staticmethod
+    def _forget(wall):
+        # A extensão do grupo não encolhe: a parede continua existindo acima
+        wall[5][2].remove(wall)
+
+
+class SimState:
+    """Estado completo de uma partida.
+
+    `use_sweep=False` volta à varredura linear de todos os objetos na colisão.
+    `narrowphase(player, obj)`, se dado, confirma cada colisão de retângulos
+    (ex.: teste pixel a pixel com máscaras).
+
+    Objetos removidos voltam para `free_objects` e são reaproveitados nos
+    próximos spawns (e nas próximas partidas, via `reset`), então as
+    referências recebidas nos eventos só valem até o passo seguinte.
+    """
+    def __init__(self, seed=None, use_sweep=True, narrowphase=None):
+        self.spawns = SpawnSchedule(seed)
+        self.player = SimPlayer()
+        self.objects = [] # Em ordem de spawn
+        self.free_objects = [] # Pool de SimObjects reciclados
+        self.next_id = 0 # Nunca volta a zero: ids são únicos entre partidas
+        self.sweep = SweepAndPrune(*PLAYER_BAND) if use_sweep else None
+        self.narrowphase = narrowphase
+        self.profiler = None # Opcional: objeto com lap(nome), para medir cada fase do passo
+        self._start(seed)
+
+    def reset(self, seed=None):
+        """Começa uma nova partida reaproveitando jogador, objetos e estruturas."""
+        self.spawns.reset(seed)
+        self._start(seed)
+
+    def _start(self, seed):
+        self.seed = seed
+        self.time_ms = 0.0
+        self.frame = 0
+        self.frames = 0.0 # Tempo de movimento acumulado, em frames
+        self.score = 0
+        self.game_speed = INITIAL_GAME_SPEED
+        self.alive = True
+        self.death = None # Objeto que matou a Alice
+        self.player.reset()
+        self.free_objects.extend(self.objects)
+        self.objects.clear()
+        if self.sweep is not None:
+            self.sweep.clear()
+
+    @property
+    def phase(self):
+        return get_phase(self.score)
+
+
+# --- Passo da Simulação ---
+def spawn_object(state, spawn=None):
+    """Coloca no túnel o `spawn` dado (tupla da SpawnSchedule) ou o próximo da fila."""
+    if spawn is None:
+        spawn = state.spawns.pop_next(state)
+    _, obj_type, x, y, width, height = spawn
+    return add_object(state, obj_type, x, y, width, height, state.game_speed)
+
+
+def add_object(state, obj_type, x, y, width, height, speed):
+    """Coloca um objeto no túnel (e no sweep and prune da colisão)."""
+    if state.free_objects:
+        obj = state.free_objects.pop()
+        obj.reset(state.next_id, obj_type, x, y, width, height, speed)
+    else:
+        obj = SimObject(state.next_id, obj_type, x, y, width, height, speed)
+    state.next_id += 1
+    state.objects.append(obj)
+    if state.sweep is not None:
+        state.sweep.insert(obj, state.frames)
+    return obj
+
+
+def remove_object(state, obj):
+    state.objects.remove(obj)
+    state.free_objects.append(obj)
+    if state.sweep is not None:
+        state.sweep.remove(obj)
+
+
+def move_objects(state, frames, events):
+    """Sobe todos os objetos e descarta os que saíram pelo topo."""
+    state.frames += frames
+    survivors = []
+    for obj in state.objects:
+        obj.y -= obj.speed * frames
+        if obj.y + obj.height < 0:
+            events.append(('despawn', obj)) # Já saiu da faixa da Alice (e da varredura)
+            state.free_objects.append(obj)
+        else:
+            survivors.append(obj)
+    state.objects = survivors
+
+
+def _overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def find_hits(state):
+    """Objetos que colidem com a Alice, em ordem de spawn."""
+    player = state.player
+    px, py, pw, ph = player.x, player.y, player.width, player.height
+    if state.sweep is not None:
+        candidates = state.sweep.candidates(state.frames)
+    else:
+        candidates = state.objects
+
+    narrowphase = state.narrowphase
+    return [
+        obj for obj in candidates
+        if _overlap(px, py, pw, ph, obj.x, obj.y, obj.width, obj.height)
+        and (narrowphase is None or narrowphase(player, obj))
+    ]
+
+
+def step(state, inp):
+    """Avança a partida um passo fixo de FRAME_MS com a entrada `inp` (bits INPUT_*).
+
+    Movimento e score são inteiros por passo (o resto é descartado), então
+    o passo só existe nesse tamanho: outro dt mudaria as regras.
+
+    Retorna a lista de eventos do passo como tuplas (tipo, objeto):
+    'spawn', 'despawn', 'pickup' e 'death'.
+    """
+    if not state.alive:
+        return []
+    events = []
+    state.time_ms += FRAME_MS
+    state.frame += 1
+
+    prof = state.profiler
+
+    # --- Spawn (pelo tempo de simulação, não por timers do SO) ---
+    for spawn in state.spawns.due(state):
+        events.append(('spawn', spawn_object(state, spawn)))
+    if prof is not None:
+        prof.lap('spawn')
+
+    # --- Jogador ---
+    player = state.player
+    move = PLAYER_SPEED
+    if inp & INPUT_LEFT:
+        player.x -= move
+    if inp & INPUT_RIGHT:
+        player.x += move
+    player.x = max(0, player.x) # Limites da tela
+    player.x = min(SCREEN_WIDTH - player.width, player.x)
+
+    if player.effect and state.time_ms - player.effect_timer > EFFECT_DURATION:
+        player.set_effect(None, state.time_ms)
+
+    # --- Objetos ---
+    move_objects(state, 1, events)
+
+    # Aumenta a velocidade do jogo gradualmente
+    state.game_speed += GAME_SPEED_RAMP
+
+    # Aumenta o score com base na velocidade do jogo e multiplicador
+    state.score += int(player.score_multiplier * (state.game_speed / 4))
+
+    if prof is not None:
+        prof.lap('movement')
+
+    # --- Colisões ---
+    for obj in find_hits(state):
+        if obj.obj_type == 'danger':
+            state.alive = False
+            state.death = obj
+            events.append(('death', obj))
+        else:
+            player.set_effect(obj.obj_type, state.time_ms)
+            remove_object(state, obj)
+            events.append(('pickup', obj))
+    if prof is not None:
+        prof.lap('collision')
+
+    return events
+
+
+# --- Bots ---
+def idle_policy(state):
+    """Bot que nunca se move."""
+    return 0
+
+
+def make_random_policy(seed=None):
+    """Bot aleatório: segura uma direção (ou fica parado) por alguns frames."""
+    rng = random.Random(seed) # RNG próprio, para não alterar a sequência de spawn
+    current = [0, 0] # [entrada, frames restantes]
+
+    def policy(state):
+        if current[1] <= 0:
+            current[0] = rng.choice((0, INPUT_LEFT, INPUT_RIGHT))
+            current[1] = rng.randint(5, 40)
+        current[1] -= 1
+        return current[0]
+    return policy
+
+
+DODGE_LOOKAHEAD = 220 # Distância (px) abaixo da Alice que o bot observa
+DODGE_MARGIN = 8
+
+
+def dodge_policy(state):
+    """Bot roteirizado: desvia do obstáculo mais próximo e busca itens."""
+    player = state.player
+    left, right = player.x - DODGE_MARGIN, player.x + player.width + DODGE_MARGIN
+    bottom = player.y + player.height
+    center = player.x + player.width / 2
+
+    threat = None
+    target = None
+    for obj in state.objects:
+        distance = obj.y - bottom
+        if distance < -obj.height - player.height or distance > DODGE_LOOKAHEAD:
+            continue
+        if obj.obj_type == 'danger':
+            if obj.x < right and left < obj.x + obj.width and (threat is None or obj.y < threat.y):
+                threat = obj
+        elif target is None or obj.y < target.y:
+            target = obj
+
+    if threat is not None:
+        # Vai para o lado com espaço suficiente, preferindo o mais próximo
+        room_left = threat.x - player.width - DODGE_MARGIN >= 0
+        room_right = threat.x + threat.width + player.width + DODGE_MARGIN <= SCREEN_WIDTH
+        go_left = center < threat.x + threat.width / 2
+        if go_left and not room_left:
+            go_left = False
+        elif not go_left and not room_right:
+            go_left = True
+        return INPUT_LEFT if go_left else INPUT_RIGHT
+
+    if target is not None:
+        target_center = target.x + target.width / 2
+        if target_center < center - PLAYER_SPEED:
+            return INPUT_LEFT
+        if target_center > center + PLAYER_SPEED:
+            return INPUT_RIGHT
+    return 0
+
+
+# Cada bot é uma fábrica: recebe a seed da partida e devolve a policy
+BOTS = {
+    'idle': lambda seed: idle_policy,
+    'random': make_random_policy,
+    'dodge': lambda seed: dodge_policy,
+}
+
+
+# --- Execução Headless ---
+def run_headless(policy=idle_policy, seed=None, max_ms=None):
+    """Roda uma partida inteira sem tela, sem limite de FPS.
+
+    `policy(state)` devolve os bits de entrada de cada passo.
+    """
+    state = SimState(seed)
+    while state.alive and (max_ms is None or state.time_ms < max_ms):
+        step(state, policy(state))
+    return state
+
+
+# --- Simulação em Lote (balanceamento) ---
+def play_seeded(seed, bot='dodge', max_ms=None):
+    """Joga uma partida com a seed e o bot dados. Retorna (seed, score, tempo_ms, fase)."""
+    state = run_headless(BOTS[bot](seed), seed=seed, max_ms=max_ms)
+    return seed, state.score, state.time_ms, state.phase
+
+
+def _play_chunk(args):
+    seeds, bot, max_ms = args
+    return [play_seeded(seed, bot, max_ms) for seed in seeds]
+
+
+def run_batch(games, seed=0, bot='dodge', workers=None, max_ms=None):
+    """Roda `games` partidas (seeds seed..seed+games-1) em paralelo.
+
+    O resultado vem na ordem das seeds, então é o mesmo para qualquer
+    número de workers.
+    """
+    seeds = list(range(seed, seed + games))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [play_seeded(s, bot, max_ms) for s in seeds]
+
+    # Fatias contíguas, algumas por worker, para diluir o custo de IPC
+    chunk = max(1, games // (workers * 8))
+    chunks = [(seeds[i:i + chunk], bot, max_ms) for i in range(0, games, chunk)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_play_chunk, chunks):
+            results.extend(part)
+    return results
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(results):
+    """Agrega sobrevivência, distribuição de score e taxa de chegada em cada fase."""
+    games = len(results)
+    scores = sorted(r[1] for r in results)
+    survival = sorted(r[2] / 1000 for r in results)
+    phases = [r[3] for r in results]
+
+    def distribution(values):
+        return {
+            'mean': sum(values) / games if games else 0,
+            'min': values[0] if values else 0,
+            'p10': _percentile(values, 10),
+            'p50': _percentile(values, 50),
+            'p90': _percentile(values, 90),
+            'max': values[-1] if values else 0,
+        }
+
+    return {
+        'games': games,
+        'survival_s': distribution(survival),
+        'score': distribution(scores),
+        'phase_reached': {
+            str(phase): sum(1 for p in phases if p >= phase) / games if games else 0
+            for phase in sorted(PHASES)
+        },
+    }
+
+
+def format_report(report):
+    lines = [f"Partidas: {report['games']}"]
+    for key, label in (('survival_s', 'Sobrevivência (s)'), ('score', 'Score')):
+        d = report[key]
+        lines.append(
+            f"{label:18} média {d['mean']:10.1f} | mín {d['min']:8.1f} | p10 {d['p10']:8.1f} | "
+            f"p50 {d['p50']:8.1f} | p90 {d['p90']:8.1f} | máx {d['max']:8.1f}"
+        )
+    for phase, rate in report['phase_reached'].items():
+        lines.append(f"Chegaram à fase {phase}: {rate:6.1%}")
+    if 'elapsed_s' in report:
+        lines.append(f"Tempo: {report['elapsed_s']:.2f}s ({report['games_per_s']:.0f} partidas/s)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula partidas em lote para ajustar a dificuldade.")
+    parser.add_argument('--games', type=int, default=1000, help="número de partidas")
+    parser.add_argument('--seed', type=int, default=0, help="seed da primeira partida")
+    parser.add_argument('--bot', choices=sorted(BOTS), default='dodge', help="bot que joga as partidas")
+    parser.add_argument('--workers', type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument('--max-seconds', type=float, default=600, help="duração máxima de cada partida")
+    parser.add_argument('--json', metavar='ARQUIVO', help="também salva o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_batch(args.games, args.seed, args.bot, args.workers, args.max_seconds * 1000)
+    elapsed = time.perf_counter() - start
+
+    report = summarize(results)
+    report['bot'] = args.bot
+    report['seed'] = args.seed
+    report['elapsed_s'] = elapsed
+    report['games_per_s'] = args.games / elapsed if elapsed else 0
+    print(format_report(report))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
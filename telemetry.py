@@ -0,0 +1,170 @@
+"""Telemetria das partidas, gravada em lotes fora do loop de render.
+
+O jogo só acumula eventos (dicts) numa lista. A cada TELEMETRY_BATCH eventos
+(ou TELEMETRY_FLUSH_MS) o lote vai para uma fila limitada, sem esperar. Uma
+thread em segundo plano serializa os lotes e grava em arquivos JSONL
+comprimidos (gzip) em TELEMETRY_DIR, trocando de arquivo a cada
+TELEMETRY_FILE_BYTES e mantendo só os TELEMETRY_KEEP_FILES mais recentes.
+
+Se o disco não acompanhar e a fila encher, o lote é descartado e contado em
+`dropped_batches`/`dropped_events`: um disco lento nunca segura um frame.
+
+Eventos (campo 'event'): session_start, score, phase, pickup, death,
+session_end, frames, quality (nível de qualidade, ao iniciar e a cada troca) e
+telemetry (contadores, ao fechar).
+"""
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+TELEMETRY_DIR = "telemetry"
+TELEMETRY_QUEUE_BATCHES = 64            # Lotes esperando a thread de escrita
+TELEMETRY_BATCH = 256                   # Eventos por lote
+TELEMETRY_FLUSH_MS = 2000               # Lote incompleto sai depois deste tempo
+TELEMETRY_FILE_BYTES = 4 * 1024 * 1024  # JSONL (antes do gzip) por arquivo
+TELEMETRY_KEEP_FILES = 20
+TELEMETRY_SUFFIX = ".jsonl.gz"
+
+SCORE_SAMPLE_MS = 1000    # Score ao longo do tempo: uma amostra por segundo de jogo
+FRAME_STATS_FRAMES = 600  # Frames resumidos em cada evento 'frames'
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[int(round(q * (len(sorted_values) - 1)))]
+
+
+class Telemetry:
+    """Buffer de eventos em memória + fila limitada + thread de escrita com rotação."""
+    def __init__(self, directory=TELEMETRY_DIR, batch=TELEMETRY_BATCH, flush_ms=TELEMETRY_FLUSH_MS,
+                 queue_batches=TELEMETRY_QUEUE_BATCHES, file_bytes=TELEMETRY_FILE_BYTES,
+                 keep_files=TELEMETRY_KEEP_FILES):
+        self.directory = directory
+        self.batch = batch
+        self.flush_ms = flush_ms
+        self.file_bytes = file_bytes
+        self.keep_files = keep_files
+        self.run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.next_session = 0
+        self.frame_times = [] # ms de cada frame desde o último evento 'frames'
+
+        # Contadores
+        self.queued_events = 0
+        self.dropped_events = 0
+        self.dropped_batches = 0
+        self.written_events = 0 # Atualizado pela thread de escrita
+        self.errors = 0
+
+        self._file_index = 0
+        self._queue = queue.Queue(maxsize=queue_batches)
+        self._thread = threading.Thread(target=self._worker, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- Coleta (thread do jogo) ----------
+    def emit(self, kind, **fields):
+        """Registra um evento. Só um append: o disco é com a thread de escrita."""
+        fields['event'] = kind
+        fields['time'] = round(time.time(), 3)
+        self.buffer.append(fields)
+        if len(self.buffer) >= self.batch:
+            self.flush()
+
+    def start_session(self, **fields):
+        """Abre uma sessão (uma partida de um jogador) e retorna o id usado nos eventos dela."""
+        session = f"{self.run_id}_{self.next_session}"
+        self.next_session += 1
+        self.emit('session_start', session=session, **fields)
+        return session
+
+    def frame(self, ms):
+        """Tempo de um frame; a cada FRAME_STATS_FRAMES frames vira um evento 'frames'."""
+        self.frame_times.append(ms)
+        if len(self.frame_times) >= FRAME_STATS_FRAMES:
+            self._frame_stats()
+
+    def _frame_stats(self):
+        times = sorted(self.frame_times)
+        self.frame_times = []
+        if times:
+            self.emit('frames', count=len(times), mean_ms=round(sum(times) / len(times), 3),
+                      p50_ms=round(_percentile(times, 0.50), 3), p95_ms=round(_percentile(times, 0.95), 3),
+                      p99_ms=round(_percentile(times, 0.99), 3), max_ms=round(times[-1], 3))
+
+    def tick(self):
+        """Chamado uma vez por frame: envia o lote incompleto se ele já esperou TELEMETRY_FLUSH_MS."""
+        if self.buffer and (time.monotonic() - self.last_flush) * 1000 >= self.flush_ms:
+            self.flush()
+
+    def flush(self):
+        """Passa o buffer para a fila sem bloquear; fila cheia descarta o lote (e conta)."""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        self.last_flush = time.monotonic()
+        try:
+            self._queue.put_nowait(batch)
+            self.queued_events += len(batch)
+        except queue.Full:
+            self.dropped_batches += 1
+            self.dropped_events += len(batch)
+
+    def stats(self):
+        return {
+            'queued_events': self.queued_events,
+            'written_events': self.written_events,
+            'dropped_events': self.dropped_events,
+            'dropped_batches': self.dropped_batches,
+            'errors': self.errors,
+        }
+
+    def close(self):
+        """Envia o que falta e espera a gravação (chamar ao sair do jogo)."""
+        self._frame_stats()
+        self.emit('telemetry', **self.stats())
+        self.flush()
+        self._queue.put(None) # Aqui pode esperar: o jogo já acabou
+        self._thread.join()
+
+    # ---------- Escrita (thread em segundo plano) ----------
+    def _open_next(self):
+        """Abre o próximo arquivo da rotação e apaga os mais antigos além de keep_files."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.run_id}_{self._file_index:04d}{TELEMETRY_SUFFIX}")
+        self._file_index += 1
+        out = gzip.open(path, 'wb')
+
+        files = sorted(name for name in os.listdir(self.directory) if name.endswith(TELEMETRY_SUFFIX))
+        for name in files[:max(0, len(files) - self.keep_files)]:
+            os.remove(os.path.join(self.directory, name))
+        return out
+
+    def _worker(self):
+        out = None
+        written = 0 # Bytes (sem compressão) no arquivo atual
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                break
+            data = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in batch).encode()
+            try:
+                if out is None or written >= self.file_bytes:
+                    if out is not None:
+                        out.close()
+                    out = self._open_next()
+                    written = 0
+                out.write(data)
+                out.flush() # Sync flush do gzip: o arquivo fica legível até aqui mesmo se o jogo cair
+                written += len(data)
+                self.written_events += len(batch)
+            except OSError as e:
+                self.errors += 1
+                out = None # Tenta um arquivo novo no próximo lote
+                print(f"Aviso: não foi possível gravar a telemetria ({e})", file=sys.stderr)
+        if out is not None:
+            out.close()